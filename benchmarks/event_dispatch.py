@@ -0,0 +1,105 @@
+"""Compare gateway event dispatch into the Cleanup cog between event loops.
+
+Each iteration decodes a GUILD_MEMBER_REMOVE payload, parses it the same way
+discord.py does for gateway events, and waits for the Cleanup cog to buffer
+the deletion. No database or Discord connection is needed since flushing is
+disabled. For example:
+
+    uv run benchmarks/event_dispatch.py --events 100000 --loop asyncio uvloop
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import cast
+
+import discord
+
+from thesteambot.bot.__main__ import get_loop_factory
+from thesteambot.bot.bot import Bot
+from thesteambot.bot.cogs.cleanup import Cleanup
+from thesteambot.db import Pool
+from thesteambot.oauth import DiscordOAuthClient
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--loop",
+        nargs="+",
+        choices=("asyncio", "uvloop"),
+        default=["asyncio", "uvloop"],
+    )
+    args = parser.parse_args()
+
+    payloads = create_payloads(args.events)
+    for loop in args.loop:
+        loop_factory = get_loop_factory(loop)
+        timings: list[float] = []
+        for _ in range(args.repeat):
+            with asyncio.Runner(loop_factory=loop_factory) as runner:
+                timings.append(runner.run(time_dispatch(payloads)))
+
+        best = min(timings)
+        print(loop)
+        print(f"  best:   {best:.3f}s ({len(payloads) / best:,.0f} events/s)")
+        print(f"  median: {statistics.median(timings):.3f}s")
+
+
+def create_payloads(n: int) -> list[str]:
+    # Use the same guild throughout, but never cache it, so the raw event
+    # is dispatched without any member lookups
+    return [
+        json.dumps(
+            {
+                "guild_id": "1000000000000000000",
+                "user": {
+                    "id": str(2000000000000000000 + i),
+                    "username": f"user{i}",
+                    "discriminator": "0",
+                    "global_name": None,
+                    "avatar": None,
+                },
+            }
+        )
+        for i in range(n)
+    ]
+
+
+async def time_dispatch(payloads: list[str]) -> float:
+    bot = Bot(
+        base_url="https://example.com",
+        extensions=(),
+        # Neither are used, since the cog isn't allowed to flush
+        pool=cast(Pool, None),
+        oauth=cast(DiscordOAuthClient, None),
+    )
+    async with bot:
+        cog = Cleanup(bot, max_pending=len(payloads) + 1)
+        cog.cleanup_loop.cancel()
+        cog.flush_loop.cancel()
+        await bot.add_cog(cog)
+
+        state = bot._connection
+        start = time.perf_counter()
+        for payload in payloads:
+            state.parse_guild_member_remove(discord.utils._from_json(payload))
+
+        # Listeners run as separate tasks, so wait for them to finish
+        while cog.pending < len(payloads):
+            await asyncio.sleep(0)
+
+        elapsed = time.perf_counter() - start
+
+        # Nothing to flush when the cog is unloaded
+        cog._pending_members.clear()
+
+    return elapsed
+
+
+if __name__ == "__main__":
+    main()
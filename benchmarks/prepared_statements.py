@@ -0,0 +1,72 @@
+"""Compare query latency with and without the prepared statement registry.
+
+This requires a migrated database and the same DB_* environment variables
+as the bot. For example:
+
+    uv run benchmarks/prepared_statements.py --iterations 5000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from thesteambot.db import DatabaseClient, Pool, create_pool
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--statement-cache-size", type=int, default=100)
+    args = parser.parse_args()
+
+    asyncio.run(async_main(args.iterations, args.statement_cache_size))
+
+
+async def async_main(iterations: int, statement_cache_size: int) -> None:
+    modes = {
+        f"prepared (statement_cache_size={statement_cache_size})": (
+            statement_cache_size
+        ),
+        "unprepared (statement_cache_size=0)": 0,
+    }
+    for mode, size in modes.items():
+        async with create_pool(statement_cache_size=size) as pool:
+            first = await time_first_use(pool)
+            timings = await time_queries(pool, iterations)
+
+        timings.sort()
+        print(mode)
+        print(f"  first use: {first * 1000:.3f}ms")
+        print(f"  mean:      {statistics.fmean(timings) * 1000:.3f}ms")
+        print(f"  p50:       {timings[len(timings) // 2] * 1000:.3f}ms")
+        print(f"  p99:       {timings[int(len(timings) * 0.99)] * 1000:.3f}ms")
+
+
+async def time_first_use(pool: Pool) -> float:
+    async with pool.acquire() as conn:
+        start = time.perf_counter()
+        await run_queries(DatabaseClient(conn))
+        return time.perf_counter() - start
+
+
+async def time_queries(pool: Pool, iterations: int) -> list[float]:
+    timings: list[float] = []
+    async with pool.acquire() as conn:
+        client = DatabaseClient(conn)
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await run_queries(client)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def run_queries(client: DatabaseClient) -> None:
+    # IDs don't need to exist, we only care about the round trips
+    await client.get_discord_oauth(0)
+    await client.get_discord_steam_links(0, guild_id=0)
+    await client.get_one_discord_member_steam(guild_id=0, user_id=0, steam_id=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,52 @@
 import asyncio
 import logging
 import os
-from contextlib import asynccontextmanager
-from typing import AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
 
 import discord
-import hikari
 
 from thesteambot.bot.bot import Bot
 from thesteambot.db import create_pool
+from thesteambot.oauth import DiscordOAuthClient
+
+log = logging.getLogger(__name__)
 
 DEFAULT_EXTENSIONS = (
     "thesteambot.bot.cogs.cleanup",
     "thesteambot.bot.cogs.errors",
+    "thesteambot.bot.cogs.links",
     "thesteambot.bot.cogs.oauth",
+    "thesteambot.bot.cogs.refresh",
+    "thesteambot.bot.cogs.roster",
+    "thesteambot.bot.cogs.sync",
     "jishaku",
 )
 
 
 def main() -> None:
     try:
-        asyncio.run(async_main())
+        with asyncio.Runner(loop_factory=get_loop_factory()) as runner:
+            runner.run(async_main())
     except KeyboardInterrupt:
         pass
 
 
+def get_loop_factory(
+    loop: str | None = None,
+) -> Callable[[], asyncio.AbstractEventLoop] | None:
+    if loop is None:
+        loop = os.getenv("BOT_LOOP") or "asyncio"
+
+    if loop == "asyncio":
+        return None
+    elif loop == "uvloop":
+        import uvloop  # type: ignore
+
+        return uvloop.new_event_loop
+    raise ValueError(f"BOT_LOOP must be asyncio or uvloop, not {loop!r}")
+
+
 async def async_main() -> None:
     debug = os.getenv("DEBUG") not in (None, "", "0")
     extensions = os.getenv("BOT_EXTENSIONS")
@@ -41,24 +63,62 @@ async def async_main() -> None:
         assert __package__ is not None
         logging.getLogger(__package__.partition(".")[0]).setLevel(logging.DEBUG)
 
-    async with create_pool() as pool, start_rest_app() as rest:
+    loop = asyncio.get_running_loop()
+    executor_workers = os.getenv("BOT_EXECUTOR_WORKERS")
+    if executor_workers:
+        executor = ThreadPoolExecutor(max_workers=int(executor_workers))
+        loop.set_default_executor(executor)
+
+    log.info(
+        "Using event loop %s.%s",
+        type(loop).__module__,
+        type(loop).__qualname__,
+    )
+
+    shard_count, shard_ids = get_shards()
+    if shard_ids is not None:
+        log.info("Running shards %s of %d", shard_ids, shard_count)
+
+    async with create_pool() as pool, DiscordOAuthClient() as oauth:
         bot = Bot(
             base_url=base_url,
             extensions=extensions,
             pool=pool,
-            rest=rest,
+            oauth=oauth,
+            shard_count=shard_count,
+            shard_ids=shard_ids,
         )
-        await bot.start(token)
+        # Close the bot before the pool so cogs can still write on unload
+        async with bot, bot.invalidations.listen(pool):
+            await bot.start(token)
 
 
-@asynccontextmanager
-async def start_rest_app() -> AsyncIterator[hikari.RESTApp]:
-    rest = hikari.RESTApp()
-    await rest.start()
-    try:
-        yield rest
-    finally:
-        await rest.close()
+def get_shards() -> tuple[int | None, list[int] | None]:
+    """Return the total shard count and the shards this process should run.
+
+    Without BOT_SHARD_COUNT, Discord's recommended shard count is used
+    and every shard runs in this process. With BOT_CLUSTER_COUNT, shards
+    are split into contiguous ranges, one for each cluster.
+    """
+    shard_count = os.getenv("BOT_SHARD_COUNT")
+    cluster_count = int(os.getenv("BOT_CLUSTER_COUNT") or 1)
+    cluster_id = int(os.getenv("BOT_CLUSTER_ID") or 0)
+
+    if not shard_count:
+        if cluster_count > 1:
+            raise ValueError("BOT_SHARD_COUNT is required with BOT_CLUSTER_COUNT")
+        return None, None
+
+    shard_count = int(shard_count)
+    if not 0 <= cluster_id < cluster_count <= shard_count:
+        raise ValueError(
+            f"BOT_CLUSTER_ID must be between 0 and {cluster_count - 1}, "
+            f"and BOT_CLUSTER_COUNT can't exceed {shard_count} shards"
+        )
+
+    start = shard_count * cluster_id // cluster_count
+    end = shard_count * (cluster_id + 1) // cluster_count
+    return shard_count, list(range(start, end))
 
 
 if __name__ == "__main__":
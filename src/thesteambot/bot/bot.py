@@ -1,40 +1,85 @@
 import logging
 from contextlib import asynccontextmanager
-from typing import AsyncIterator, Sequence
+from typing import TYPE_CHECKING, AsyncIterator, Sequence
 
-import asyncpg
 import discord
-import hikari
 from discord.ext import commands
-from hikari.api import RESTClient
 
-from thesteambot.oauth import acquire_rest_client, wrap_rest_client
-from thesteambot.db import Connection, DatabaseClient
+from thesteambot.oauth import (
+    DiscordOAuthClient,
+    DiscordUserClient,
+    get_access_token,
+    wrap_rest_client,
+)
+from thesteambot.db import (
+    Connection,
+    DatabaseClient,
+    DiscordOAuthCache,
+    InstrumentedConnection,
+    InvalidationChannel,
+    InvalidationListener,
+    Pool,
+    QueryMetrics,
+    TTLCache,
+)
+
+if TYPE_CHECKING:
+    from thesteambot.bot.views.oauth import SteamConnection
 
 log = logging.getLogger(__name__)
 
 
-class Bot(commands.Bot):
+class Bot(commands.AutoShardedBot):
     def __init__(
         self,
         *,
         base_url: str,
         extensions: Sequence[str],
-        pool: asyncpg.Pool,
-        rest: hikari.RESTApp,
+        pool: Pool,
+        oauth: DiscordOAuthClient,
+        shard_count: int | None = None,
+        shard_ids: Sequence[int] | None = None,
     ) -> None:
         intents = discord.Intents.default()
         intents.members = True
 
+        # Without explicit shards, every recommended shard runs here
+        shard_options = {}
+        if shard_ids is not None:
+            shard_options["shard_ids"] = list(shard_ids)
+
         super().__init__(
             command_prefix=commands.when_mentioned,
             help_command=None,
             intents=intents,
+            shard_count=shard_count,
             strip_after_prefix=True,
+            **shard_options,
         )
 
         self.pool = pool
-        self.rest = rest
+        self.oauth = oauth
+        self.oauth_cache = DiscordOAuthCache()
+        self.query_metrics = QueryMetrics()
+        # Steam connections fetched from each user's Discord account
+        self.connections_cache: TTLCache[int, tuple[SteamConnection, ...]] = TTLCache(
+            ttl=60
+        )
+
+        # Keep our caches consistent with writes from the web app
+        self.invalidations = InvalidationListener()
+        self.invalidations.subscribe(
+            InvalidationChannel.DISCORD_OAUTH,
+            self.oauth_cache,
+        )
+        self.invalidations.subscribe(
+            InvalidationChannel.DISCORD_OAUTH,
+            self.connections_cache,
+        )
+        self.invalidations.subscribe(
+            InvalidationChannel.STEAM_LINKS,
+            self.connections_cache,
+        )
         self._base_url = base_url
         self._extensions_to_load = extensions
 
@@ -50,11 +95,12 @@ class Bot(commands.Bot):
         transaction: bool = True,
     ) -> AsyncIterator[Connection]:
         async with self.pool.acquire() as conn:
+            instrumented = InstrumentedConnection(conn, self.query_metrics)
             if transaction:
                 async with conn.transaction():
-                    yield conn
+                    yield instrumented
             else:
-                yield conn
+                yield instrumented
 
     @asynccontextmanager
     async def acquire_db_client(
@@ -63,26 +109,42 @@ class Bot(commands.Bot):
         transaction: bool = True,
     ) -> AsyncIterator[DatabaseClient]:
         async with self.acquire_db_conn(transaction=transaction) as conn:
-            yield DatabaseClient(conn)
+            yield DatabaseClient(conn, oauth_cache=self.oauth_cache)
 
     @asynccontextmanager
     async def acquire_rest_client(
         self,
         user: int | discord.User | discord.Member,
-    ) -> AsyncIterator[RESTClient]:
+    ) -> AsyncIterator[DiscordUserClient]:
         if isinstance(user, int):
             user_id = user
         else:
             user_id = user.id
 
-        async with self.pool.acquire() as conn:
-            db_client = DatabaseClient(conn)
-            rest_client = await acquire_rest_client(self.rest, db_client, user_id)
-
+        # Cached tokens are never close enough to expiry to need refreshing,
+        # so we can skip checking out a connection altogether
+        row = self.oauth_cache.get(user_id)
+        if row is not None:
+            access_token, token_type = row["access_token"], row["token_type"]
+        else:
+            async with self.acquire_db_client(transaction=False) as db_client:
+                access_token, token_type = await get_access_token(
+                    self.oauth,
+                    db_client,
+                    user_id,
+                )
+
+        rest_client = DiscordUserClient(self.oauth, access_token, token_type)
         wrapped = wrap_rest_client(self.acquire_db_client, rest_client, user_id)
         async with wrapped as rest_client:
             yield rest_client
 
+    def get_shard_ids(self) -> list[int]:
+        """Return the IDs of every shard run by this process."""
+        if self.shard_ids is not None:
+            return list(self.shard_ids)
+        return list(range(self.shard_count or 1))
+
     def url_for(self, path: str) -> str:
         return self._base_url + "/" + path.lstrip("/")
 
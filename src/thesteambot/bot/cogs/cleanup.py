@@ -1,3 +1,4 @@
+import asyncio
 import datetime
 import logging
 import discord
@@ -9,9 +10,35 @@ log = logging.getLogger(__name__)
 
 
 class Cleanup(commands.Cog):
-    def __init__(self, bot: Bot) -> None:
+    def __init__(
+        self,
+        bot: Bot,
+        *,
+        max_pending: int = 1000,
+        max_buffered: int = 100_000,
+    ) -> None:
         self.bot = bot
+        self.max_pending = max_pending
+        self.max_buffered = max_buffered
+
+        # Gateway deletions are buffered and written in batches,
+        # since mass kicks and purges can otherwise exhaust the pool
+        self._pending_channels: set[int] = set()
+        self._pending_members: set[tuple[int, int]] = set()
+        # Members who rejoined while their removal was being flushed
+        self._rejoined_members: set[tuple[int, int]] = set()
+        self._flush_lock = asyncio.Lock()
+
         self.cleanup_loop.start()
+        self.flush_loop.start()
+
+    async def cog_unload(self) -> None:
+        self.cleanup_loop.cancel()
+        self.flush_loop.cancel()
+        try:
+            await self.flush()
+        except Exception:
+            log.exception("Failed to flush pending deletions")
 
     # @commands.Cog.listener("on_guild_remove")
     # async def remove_guild(self, guild: discord.Guild):
@@ -23,26 +50,85 @@ class Cleanup(commands.Cog):
 
     @commands.Cog.listener("on_guild_channel_delete")
     async def remove_guild_channel(self, channel: discord.abc.GuildChannel) -> None:
-        async with self.bot.acquire_db_conn() as conn:
-            await conn.execute(
-                "DELETE FROM discord_channel WHERE channel_id = $1", channel.id
-            )
+        self._pending_channels.add(channel.id)
+        await self.maybe_flush()
 
     @commands.Cog.listener("on_raw_thread_delete")
     async def remove_thread(self, payload: discord.RawThreadDeleteEvent) -> None:
-        async with self.bot.acquire_db_conn() as conn:
-            await conn.execute(
-                "DELETE FROM discord_channel WHERE channel_id = $1", payload.thread_id
-            )
+        self._pending_channels.add(payload.thread_id)
+        await self.maybe_flush()
 
     @commands.Cog.listener("on_raw_member_remove")
     async def remove_member(self, payload: discord.RawMemberRemoveEvent) -> None:
-        async with self.bot.acquire_db_conn() as conn:
-            await conn.execute(
-                "DELETE FROM discord_member WHERE guild_id = $1 AND user_id = $2",
-                payload.guild_id,
-                payload.user.id,
-            )
+        self._pending_members.add((payload.guild_id, payload.user.id))
+        await self.maybe_flush()
+
+    @commands.Cog.listener("on_member_join")
+    async def cancel_remove_member(self, member: discord.Member) -> None:
+        # Don't let a stale removal delete anything the member does after rejoining
+        key = (member.guild.id, member.id)
+        self._pending_members.discard(key)
+        if self._flush_lock.locked():
+            self._rejoined_members.add(key)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending_channels) + len(self._pending_members)
+
+    async def maybe_flush(self) -> None:
+        if self.pending >= self.max_pending and not self._flush_lock.locked():
+            await self.flush()
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            self._rejoined_members.clear()
+            channel_ids, self._pending_channels = self._pending_channels, set()
+            members, self._pending_members = self._pending_members, set()
+            if not channel_ids and not members:
+                return
+
+            try:
+                async with self.bot.acquire_db_client() as client:
+                    if channel_ids:
+                        await client.delete_discord_channels(channel_ids)
+                    if members:
+                        await client.delete_discord_members(members)
+            except BaseException:
+                # Keep our deletions around for the next attempt
+                self._pending_channels |= channel_ids
+                self._pending_members |= members - self._rejoined_members
+                self.trim_pending()
+                raise
+
+        log.debug(
+            "Flushed %d channel and %d member deletions",
+            len(channel_ids),
+            len(members),
+        )
+
+    def trim_pending(self) -> None:
+        # If flushes keep failing, give up on excess members rather than
+        # growing forever. The Sync cog removes them once their guild is next
+        # synced in full. Nothing reconciles channels, so those are always kept.
+        excess = len(self._pending_members) - self.max_buffered
+        if excess <= 0:
+            return
+
+        for _ in range(excess):
+            self._pending_members.pop()
+
+        log.warning(
+            "Dropped %d pending member deletions over the limit of %d",
+            excess,
+            self.max_buffered,
+        )
+
+    @tasks.loop(seconds=5)
+    async def flush_loop(self) -> None:
+        try:
+            await self.flush()
+        except Exception:
+            log.exception("Failed to flush pending deletions")
 
     @tasks.loop(time=datetime.time(0, 0, tzinfo=datetime.timezone.utc))
     async def cleanup_loop(self) -> None:
@@ -52,24 +138,41 @@ class Cleanup(commands.Cog):
 
         await self.cleanup_guilds()
 
-    async def cleanup_guilds(self) -> None:
-        # NOTE: this is incompatible with sharding
-        guild_ids = {guild.id for guild in self.bot.guilds}
-        async with self.bot.acquire_db_conn() as conn:
-            rows = await conn.fetch("SELECT guild_id FROM discord_guild")
-            rows = {row[0] for row in rows}
-            deleted = rows - guild_ids
-            for guild_id in deleted:
-                await conn.execute(
-                    "DELETE FROM discord_guild WHERE guild_id = $1",
-                    guild_id,
+    @cleanup_loop.before_loop
+    async def before_cleanup_loop(self) -> None:
+        # Guilds from shards that haven't connected yet would look removed
+        await self.bot.wait_until_ready()
+
+    async def cleanup_guilds(self, *, chunk_size: int = 500) -> None:
+        # Other clusters own guilds outside of our shards,
+        # so we can only clean up guilds from our own shards
+        guild_ids = [guild.id for guild in self.bot.guilds]
+        shard_count = self.bot.shard_count or 1
+        shard_ids = self.bot.get_shard_ids()
+        total = 0
+        while True:
+            # Commit each chunk separately so cascading deletes
+            # don't pile up in one long-running transaction
+            async with self.bot.acquire_db_client() as client:
+                deleted = await client.delete_discord_guilds_except(
+                    guild_ids,
+                    limit=chunk_size,
+                    shard_count=shard_count,
+                    shard_ids=shard_ids,
                 )
 
-        if deleted:
-            log.info("%d guilds cleaned up", len(deleted))
+            total += deleted
+            if deleted < chunk_size:
+                break
+
+            log.info("%d guilds cleaned up so far", total)
+
+        if total:
+            log.info("%d guilds cleaned up", total)
 
     # NOTE: Discord and Steam users are not removed by any event
-    # NOTE: rows can still accumulate during bot downtime
+    # NOTE: members removed during bot downtime are reconciled by the Sync cog,
+    #       but channels deleted during downtime are kept
 
 
 async def setup(bot: Bot):
@@ -0,0 +1,141 @@
+import csv
+import io
+import logging
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from thesteambot.bot.bot import Bot
+from thesteambot.bot.errors import AppCommandResponse
+
+log = logging.getLogger(__name__)
+
+MAX_IMPORT_SIZE = 8 * 1024 * 1024
+
+
+async def is_owner(interaction: discord.Interaction[Bot]) -> bool:
+    return await interaction.client.is_owner(interaction.user)
+
+
+class Links(
+    commands.GroupCog,
+    group_name="links",
+    group_description="Export and import this server's linked Steam accounts.",
+):
+    def __init__(self, bot: Bot) -> None:
+        self.bot = bot
+
+    @app_commands.command(
+        name="export",
+        description="Export this server's linked Steam accounts as CSV.",
+    )
+    @app_commands.guild_only()
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.checks.cooldown(1, 60, key=lambda interaction: interaction.guild_id)
+    async def export(self, interaction: discord.Interaction) -> None:
+        assert interaction.guild is not None
+        await interaction.response.defer(ephemeral=True, thinking=True)
+
+        # COPY output is written as-is, without decoding any rows
+        buffer = io.BytesIO()
+
+        async def write(data: bytes) -> None:
+            buffer.write(data)
+
+        async with self.bot.acquire_db_client(transaction=False) as client:
+            count = await client.export_discord_member_steam(
+                interaction.guild.id,
+                output=write,
+            )
+
+        if buffer.tell() > interaction.guild.filesize_limit:
+            raise AppCommandResponse(
+                "The export is too large to upload here. "
+                "Please ask the bot's operators for an export instead."
+            )
+
+        buffer.seek(0)
+        filename = f"steam-links-{interaction.guild.id}.csv"
+        await interaction.followup.send(
+            f"Exported {count} linked Steam account(s).",
+            file=discord.File(buffer, filename=filename),
+            ephemeral=True,
+        )
+
+    @app_commands.command(
+        name="import",
+        description="Import linked Steam accounts from a CSV export (bot owner only).",
+    )
+    @app_commands.describe(
+        file="A CSV file with user_id and steam_id columns.",
+    )
+    @app_commands.guild_only()
+    @app_commands.default_permissions(administrator=True)
+    # Imported links are shown to the guild without each member opting in,
+    # so this is reserved for the bot's operators
+    @app_commands.check(is_owner)
+    async def import_(
+        self,
+        interaction: discord.Interaction,
+        file: discord.Attachment,
+    ) -> None:
+        assert interaction.guild is not None
+        if file.size > MAX_IMPORT_SIZE:
+            raise AppCommandResponse(
+                f"The file must be smaller than {MAX_IMPORT_SIZE // 1024 // 1024} MiB."
+            )
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        links = parse_links_csv(await file.read())
+
+        async with self.bot.acquire_db_client() as client:
+            count = await client.import_discord_member_steam(
+                interaction.guild.id,
+                links=links,
+            )
+
+        log.info(
+            "Imported %d/%d Steam links into guild %d",
+            count,
+            len(links),
+            interaction.guild.id,
+        )
+
+        # Don't reveal which rows were imported, since that would tell
+        # whether a user has connected a given Steam account
+        await interaction.followup.send(
+            f"Finished importing {len(links)} row(s). Links are only imported "
+            "for members who have connected that Steam account with us.",
+            ephemeral=True,
+        )
+
+
+def parse_links_csv(data: bytes) -> list[tuple[int, int]]:
+    """Parse ``(user_id, steam_id)`` pairs from a CSV file with a header."""
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise AppCommandResponse("The file must be encoded as UTF-8.") from None
+
+    reader = csv.DictReader(io.StringIO(text, newline=""))
+    fields = reader.fieldnames or ()
+    if "user_id" not in fields or "steam_id" not in fields:
+        raise AppCommandResponse(
+            "The file must have a header with user_id and steam_id columns."
+        )
+
+    links: list[tuple[int, int]] = []
+    for row in reader:
+        try:
+            links.append((int(row["user_id"]), int(row["steam_id"])))
+        except (TypeError, ValueError):
+            raise AppCommandResponse(
+                f"Line {reader.line_num} has an invalid user_id or steam_id."
+            ) from None
+
+    return links
+
+
+async def setup(bot: Bot) -> None:
+    await bot.add_cog(Links(bot))
@@ -0,0 +1,101 @@
+import asyncio
+import datetime
+import logging
+import os
+import random
+
+from discord.ext import commands, tasks
+
+from thesteambot.bot.bot import Bot
+from thesteambot.db import Record
+from thesteambot.oauth import DiscordOAuthError, refresh_access_token
+
+log = logging.getLogger(__name__)
+
+DEFAULT_WINDOW = datetime.timedelta(minutes=30)
+DEFAULT_CONCURRENCY = 5
+
+
+class Refresh(commands.Cog):
+    """Refresh OAuth tokens shortly before they expire.
+
+    This keeps interactions from having to wait on Discord to refresh
+    their user's token, which would otherwise happen on demand.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        *,
+        window: datetime.timedelta = DEFAULT_WINDOW,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        batch_size: int = 100,
+        jitter: float = 30,
+    ) -> None:
+        self.bot = bot
+        self.window = window
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.jitter = jitter
+        self.refresh_loop.start()
+
+    async def cog_unload(self) -> None:
+        self.refresh_loop.cancel()
+
+    @tasks.loop(minutes=1)
+    async def refresh_loop(self) -> None:
+        try:
+            await self.refresh_expiring_tokens()
+        except Exception:
+            log.exception("Failed to refresh expiring tokens")
+
+    async def refresh_expiring_tokens(self) -> None:
+        async with self.bot.acquire_db_client(transaction=False) as db_client:
+            rows = await db_client.get_expiring_discord_oauth(
+                self.window,
+                limit=self.batch_size,
+            )
+
+        if not rows:
+            return
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(
+            *(self._refresh_token(semaphore, row) for row in rows)
+        )
+        log.info("%d/%d expiring tokens refreshed", sum(results), len(rows))
+
+    async def _refresh_token(self, semaphore: asyncio.Semaphore, row: Record) -> bool:
+        # Spread out requests so we don't burst Discord's token endpoint
+        await asyncio.sleep(random.uniform(0, self.jitter))
+
+        user_id = row["user_id"]
+        async with semaphore, self.bot.acquire_db_client(transaction=False) as client:
+            try:
+                await refresh_access_token(
+                    self.bot.oauth,
+                    client,
+                    user_id,
+                    access_token=row["access_token"],
+                    token_type=row["token_type"],
+                    refresh_token=row["refresh_token"],
+                    scope=row["scope"],
+                )
+            except DiscordOAuthError:
+                log.debug("Failed to refresh token for user %d", user_id, exc_info=True)
+                return False
+            except Exception:
+                log.exception("Unexpected error refreshing token for user %d", user_id)
+                return False
+
+        return True
+
+
+async def setup(bot: Bot):
+    window = os.getenv("BOT_OAUTH_REFRESH_WINDOW")
+    window = datetime.timedelta(seconds=int(window)) if window else DEFAULT_WINDOW
+
+    concurrency = os.getenv("BOT_OAUTH_REFRESH_CONCURRENCY")
+    concurrency = int(concurrency) if concurrency else DEFAULT_CONCURRENCY
+
+    await bot.add_cog(Refresh(bot, window=window, concurrency=concurrency))
@@ -0,0 +1,34 @@
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from thesteambot.bot.bot import Bot
+from thesteambot.bot.views import GuildRosterView
+
+
+class Roster(commands.Cog):
+    def __init__(self, bot: Bot) -> None:
+        self.bot = bot
+
+    @app_commands.command(
+        name="roster",
+        description="List the Steam accounts linked by members of this server.",
+    )
+    @app_commands.guild_only()
+    @app_commands.default_permissions(moderate_members=True)
+    @app_commands.checks.cooldown(1, 10, key=lambda interaction: interaction.user.id)
+    async def roster(self, interaction: discord.Interaction) -> None:
+        assert interaction.guild is not None
+
+        view = GuildRosterView(self.bot, interaction.user.id, interaction.guild.id)
+        await view.fetch_page()
+        await interaction.response.send_message(
+            ephemeral=True,
+            view=view,
+            allowed_mentions=discord.AllowedMentions.none(),
+        )
+        view.set_last_interaction(interaction)
+
+
+async def setup(bot: Bot) -> None:
+    await bot.add_cog(Roster(bot))
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+import time
+from typing import Sequence
+
+import discord
+from discord.ext import commands
+
+from thesteambot.bot.bot import Bot
+
+log = logging.getLogger(__name__)
+
+# Seconds to wait for a guild's members before syncing without them
+CHUNK_TIMEOUT = 60
+
+
+class Sync(commands.Cog):
+    """Reconcile guilds, members and channels with the database in bulk."""
+
+    def __init__(self, bot: Bot) -> None:
+        self.bot = bot
+        self._sync_lock = asyncio.Lock()
+
+    @commands.Cog.listener("on_ready")
+    async def sync_on_ready(self) -> None:
+        # Reconnects may fire this again, but one full sync at a time is enough
+        if self._sync_lock.locked():
+            return
+
+        async with self._sync_lock:
+            await self.sync_guilds(self.bot.guilds)
+
+    @commands.Cog.listener("on_guild_join")
+    async def sync_on_guild_join(self, guild: discord.Guild) -> None:
+        await self.sync_guild(guild)
+
+    async def sync_guilds(self, guilds: Sequence[discord.Guild]) -> None:
+        start = time.perf_counter()
+        for i, guild in enumerate(guilds, start=1):
+            try:
+                await self.sync_guild(guild)
+            except Exception:
+                log.exception("Failed to sync guild %d", guild.id)
+
+            if i % 100 == 0:
+                log.info("%d/%d guilds synced", i, len(guilds))
+
+        elapsed = time.perf_counter() - start
+        log.info("%d guilds synced in %.2fs", len(guilds), elapsed)
+
+    async def sync_guild(self, guild: discord.Guild) -> None:
+        # Unavailable guilds have nothing cached, which would look like
+        # every member and channel had been removed
+        if guild.unavailable:
+            log.debug("Skipping unavailable guild %d", guild.id)
+            return
+
+        if not guild.chunked:
+            try:
+                await asyncio.wait_for(guild.chunk(), timeout=CHUNK_TIMEOUT)
+            except asyncio.TimeoutError:
+                log.warning("Timed out chunking guild %d", guild.id)
+
+        user_ids = [member.id for member in guild.members]
+        # Archived threads aren't cached, so channels are only added here
+        # and left for gateway events to remove
+        channel_ids = [channel.id for channel in guild.channels]
+        channel_ids.extend(thread.id for thread in guild.threads)
+
+        # One transaction per guild to keep large syncs from
+        # holding locks on every guild at once
+        async with self.bot.acquire_db_client() as client:
+            await client.sync_discord_guild(
+                guild.id,
+                user_ids=user_ids,
+                channel_ids=channel_ids,
+                # Without every member, removing the rest would also
+                # cascade to the Steam links they chose to show
+                delete_members=guild.chunked,
+            )
+
+
+async def setup(bot: Bot):
+    await bot.add_cog(Sync(bot))
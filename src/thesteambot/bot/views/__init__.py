@@ -9,5 +9,8 @@ from .oauth import (
     SteamConnection as SteamConnection,
     SteamUserActionRow as SteamUserActionRow,
     create_manage_steam_user_view as create_manage_steam_user_view,
-    get_steam_ids as get_steam_ids,
+)
+from .roster import (
+    GuildRosterActionRow as GuildRosterActionRow,
+    GuildRosterView as GuildRosterView,
 )
@@ -8,8 +8,8 @@ import discord
 from thesteambot.bot.bot import Bot
 from thesteambot.bot.errors import MissingSteamUserError
 from thesteambot.bot.views import CancellableView
-from thesteambot.db import DatabaseClient
-from thesteambot.oauth import revoke_access_token
+from thesteambot.db import DatabaseClient, Record
+from thesteambot.oauth import DiscordOAuthError, revoke_access_token
 
 if TYPE_CHECKING:
     from thesteambot.bot.bot import Bot
@@ -32,7 +32,7 @@ class DiscordAuthorizeActionRow(discord.ui.ActionRow):
         self.add_item(
             discord.ui.Button(
                 label="Authorize",
-                url=bot.url_for("/login/discord"),
+                url=bot.url_for("/login/discord?reauthorize=1"),
             )
         )
 
@@ -65,7 +65,8 @@ class DiscordDeauthorizeActionRow(discord.ui.ActionRow[DiscordDeauthorizeView]):
         assert self.view is not None
 
         async with self.view.bot.acquire_db_client() as client:
-            await revoke_access_token(self.view.bot.rest, client, self.view.user_id)
+            await revoke_access_token(self.view.bot.oauth, client, self.view.user_id)
+        self.view.bot.connections_cache.discard(self.view.user_id)
 
         self.view.display.content = (
             "Successfully deauthorized us from your Discord account!"
@@ -88,12 +89,6 @@ class DiscordDeauthorizeActionRow(discord.ui.ActionRow[DiscordDeauthorizeView]):
         await self.view.delete()
 
 
-async def get_steam_ids(db_client: DatabaseClient, user_id: int):
-    rows = await db_client.get_discord_user_steam(user_id)
-    current_steam_ids: set[int] = {row["steam_id"] for row in rows}
-    return current_steam_ids
-
-
 class SteamConnection(NamedTuple):
     id: int
     name: str
@@ -132,54 +127,69 @@ async def get_steam_view_state(
     name: str | None,
     guild_id: int | None,
 ) -> SteamViewState:
-    user = await db_client.get_one_discord_user_steam(
+    row = await db_client.get_one_discord_steam_link(
         user_id=user_id,
         steam_id=steam_id,
+        guild_id=guild_id,
     )
-    if user is None:
-        return SteamViewState(
-            user_id=user_id,
-            steam_id=steam_id,
-            name=name,
-            user=None,
-            member=None,
-        )
-
-    member: SteamMemberState | None = None
-    if guild_id is not None:
-        member = await _get_steam_member_state(
-            db_client,
-            user_id,
-            steam_id,
-            guild_id,
-        )
-
-    return SteamViewState(
+    return _create_steam_view_state(
+        row,
         user_id=user_id,
         steam_id=steam_id,
         name=name,
-        user=SteamUserState(created_at=user["created_at"]),
-        member=member,
+        guild_id=guild_id,
     )
 
 
-async def _get_steam_member_state(
+async def get_steam_view_states(
     db_client: DatabaseClient,
+    *,
+    user_id: int,
+    connections: dict[int, SteamConnection],
+    guild_id: int | None,
+) -> dict[int, SteamViewState]:
+    """Return the state of every linked or connected Steam account for a user."""
+    rows = await db_client.get_discord_steam_links(user_id, guild_id=guild_id)
+    rows = {row["steam_id"]: row for row in rows}
+
+    states: dict[int, SteamViewState] = {}
+    for steam_id in rows.keys() | connections.keys():
+        connection = connections.get(steam_id)
+        states[steam_id] = _create_steam_view_state(
+            rows.get(steam_id),
+            user_id=user_id,
+            steam_id=steam_id,
+            name=connection.name if connection is not None else None,
+            guild_id=guild_id,
+        )
+
+    return states
+
+
+def _create_steam_view_state(
+    row: Record | None,
+    *,
     user_id: int,
     steam_id: int,
-    guild_id: int,
-) -> SteamMemberState | None:
-    member = await db_client.get_one_discord_member_steam(
-        guild_id=guild_id,
+    name: str | None,
+    guild_id: int | None,
+) -> SteamViewState:
+    user: SteamUserState | None = None
+    member: SteamMemberState | None = None
+    if row is not None:
+        user = SteamUserState(created_at=row["user_created_at"])
+        if guild_id is not None and row["member_created_at"] is not None:
+            member = SteamMemberState(
+                guild_id=guild_id,
+                created_at=row["member_created_at"],
+            )
+
+    return SteamViewState(
         user_id=user_id,
         steam_id=steam_id,
-    )
-    if member is None:
-        return None
-
-    return SteamMemberState(
-        guild_id=guild_id,
-        created_at=member["created_at"],
+        name=name,
+        user=user,
+        member=member,
     )
 
 
@@ -188,19 +198,17 @@ class ManageSteamUserView(CancellableView):
         self,
         bot: Bot,
         user_id: int,
-        steam_ids: set[int],
-        connections: dict[int, SteamConnection],
+        states: dict[int, SteamViewState],
     ) -> None:
         super().__init__()
         self.bot = bot
         self.user_id = user_id
-        self.steam_ids = steam_ids
-        self.connections = connections
+        self.states = states
         self.reset_container()
 
     def reset_container(self) -> discord.ui.Container:
         self.clear_items()
-        select = ManageSteamUserSelect(self.steam_ids, self.connections)
+        select = ManageSteamUserSelect(self.states)
         container = discord.ui.Container(
             discord.ui.TextDisplay("# Link Steam Accounts"),
             discord.ui.ActionRow(select),
@@ -212,38 +220,17 @@ class ManageSteamUserView(CancellableView):
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         return interaction.user.id == self.user_id
 
-    async def get_steam_view_state(
-        self,
-        db_client: DatabaseClient,
-        *,
-        user_id: int,
-        steam_id: int,
-        guild_id: int | None,
-    ) -> SteamViewState:
-        connection = self.connections.get(steam_id)
-        name = connection.name if connection is not None else None
-        return await get_steam_view_state(
-            db_client,
-            user_id=user_id,
-            steam_id=steam_id,
-            name=name,
-            guild_id=guild_id,
-        )
-
 
 class ManageSteamUserSelect(discord.ui.Select[ManageSteamUserView]):
-    def __init__(
-        self,
-        steam_ids: set[int],
-        connections: dict[int, SteamConnection],
-    ) -> None:
+    def __init__(self, states: dict[int, SteamViewState]) -> None:
         super().__init__(
             options=[
                 discord.SelectOption(
-                    label=c.name if (c := connections.get(steam_id)) else str(steam_id),
+                    label=state.name or str(steam_id),
                     value=str(steam_id),
+                    description="Connected" if state.user else "Not connected",
                 )
-                for steam_id in steam_ids
+                for steam_id, state in states.items()
             ],
             placeholder="Select a Steam account",
         )
@@ -251,17 +238,8 @@ class ManageSteamUserSelect(discord.ui.Select[ManageSteamUserView]):
     async def callback(self, interaction: discord.Interaction) -> None:
         assert self.view is not None
 
-        user_id = interaction.user.id
-        steam_id = int(self.values[0])
-        guild_id = interaction.guild.id if interaction.guild is not None else None
-        async with self.view.bot.acquire_db_client() as db_client:
-            state = await self.view.get_steam_view_state(
-                db_client,
-                user_id=user_id,
-                steam_id=steam_id,
-                guild_id=guild_id,
-            )
-
+        # States were fetched upfront, so no queries are needed here
+        state = self.view.states[int(self.values[0])]
         self.show_user_actions(state)
         await interaction.response.edit_message(view=self.view)
         self.view.set_last_interaction(interaction)
@@ -325,17 +303,20 @@ class SteamUserActionRow(discord.ui.ActionRow[ManageSteamUserView]):
         assert self.view is not None
 
         name = self.state.display_name
+        guild_id = interaction.guild.id if interaction.guild is not None else None
         if self.state.user is None:
-            await self.add_steam_user(interaction.user.id)
+            state = await self.add_steam_user(interaction.user.id, guild_id)
             self.display.content = f"Successfully connected the Steam account, {name}!"
             button.label = "Connected"
         else:
-            await self.delete_steam_user()
+            state = await self.delete_steam_user()
             self.display.content = (
                 f"Successfully disconnected the Steam account, {name}!"
             )
             button.label = "Deleted"
 
+        self.view.states[state.steam_id] = state
+
         button.disabled = True
         await interaction.response.edit_message(view=self.view)
         self.view.set_last_interaction(interaction)
@@ -351,46 +332,87 @@ class SteamUserActionRow(discord.ui.ActionRow[ManageSteamUserView]):
         await interaction.response.edit_message(view=self.view)
         self.view.set_last_interaction(interaction)
 
-    async def add_steam_user(self, user_id: int) -> None:
+    async def add_steam_user(
+        self,
+        user_id: int,
+        guild_id: int | None,
+    ) -> SteamViewState:
         steam_id = self.state.steam_id
         async with self.bot.acquire_db_client() as db_client:
             await db_client.add_steam_user(steam_id)
             await db_client.add_discord_user_steam(user_id, steam_id=steam_id)
+            state = await get_steam_view_state(
+                db_client,
+                user_id=user_id,
+                steam_id=steam_id,
+                name=self.state.name,
+                guild_id=guild_id,
+            )
+
+        self.bot.connections_cache.discard(user_id)
+        return state
 
-    async def delete_steam_user(self) -> None:
+    async def delete_steam_user(self) -> SteamViewState:
         steam_id = self.state.steam_id
         async with self.bot.acquire_db_client() as db_client:
             await db_client.delete_steam_user(steam_id)
 
+        self.bot.connections_cache.discard(self.state.user_id)
+        return self.state._replace(user=None, member=None)
+
 
 async def create_manage_steam_user_view(
     interaction: discord.Interaction[Bot],
 ) -> ManageSteamUserView:
     bot = interaction.client
+    connections = await fetch_steam_connections(bot, interaction.user.id)
+    connections = {c.id: c for c in connections}
 
-    # TODO: support direct authentication with Steam
-    async with bot.acquire_rest_client(interaction.user) as client:
-        connections = await client.fetch_my_connections()
+    guild_id = interaction.guild.id if interaction.guild is not None else None
+    async with bot.acquire_db_client() as db_client:
+        states = await get_steam_view_states(
+            db_client,
+            user_id=interaction.user.id,
+            connections=connections,
+            guild_id=guild_id,
+        )
+
+    if not states:
+        raise MissingSteamUserError(interaction.user)
 
-    connections = [c for c in connections if c.type == "steam"]
-    connections = {
-        int(c.id): SteamConnection(
+    return ManageSteamUserView(interaction.client, interaction.user.id, states)
+
+
+async def fetch_steam_connections(
+    bot: Bot,
+    user_id: int,
+) -> tuple[SteamConnection, ...]:
+    """Fetch the user's Steam connections from Discord.
+
+    Results are briefly cached to save repeated invocations and
+    back-navigation from spending our rate limits.
+    """
+    connections = bot.connections_cache.get(user_id)
+    if connections is not None:
+        return connections
+
+    # TODO: support direct authentication with Steam
+    try:
+        async with bot.acquire_rest_client(user_id) as client:
+            connections = await client.fetch_my_connections()
+    except DiscordOAuthError:
+        # Our login was revoked or expired, don't let it be served from cache
+        bot.connections_cache.discard(user_id)
+        raise
+
+    connections = tuple(
+        SteamConnection(
             id=int(c.id),
             name=c.name,
             public=c.visibility == 1,
         )
         for c in connections
-    }
-
-    async with bot.acquire_db_client() as db_client:
-        current_steam_ids = await get_steam_ids(db_client, interaction.user.id)
-
-    if not connections and not current_steam_ids:
-        raise MissingSteamUserError(interaction.user)
-
-    return ManageSteamUserView(
-        interaction.client,
-        interaction.user.id,
-        current_steam_ids | set(connections),
-        connections,
+        if c.type == "steam"
     )
+    bot.connections_cache.set(user_id, connections)
+    return connections
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Sequence
+
+import discord
+
+from thesteambot.bot.views import CancellableView
+from thesteambot.db import Record
+
+if TYPE_CHECKING:
+    from thesteambot.bot.bot import Bot
+
+ROSTER_PAGE_SIZE = 20
+
+
+class GuildRosterView(CancellableView):
+    """A paginated list of the Steam accounts linked in a guild.
+
+    Each page is only fetched when requested, starting after the last
+    link of the previous page, so large guilds are never read in full.
+    """
+
+    def __init__(self, bot: Bot, user_id: int, guild_id: int) -> None:
+        super().__init__()
+        self.bot = bot
+        self.user_id = user_id
+        self.guild_id = guild_id
+
+        # The key each visited page starts after, for going back
+        self.page_keys: list[tuple[int, int]] = [(0, 0)]
+        self.rows: Sequence[Record] = ()
+        self.has_next = False
+
+    async def fetch_page(self) -> None:
+        # Fetch one extra link to know if there's a next page
+        async with self.bot.acquire_db_client() as client:
+            rows = await client.get_discord_member_steam_page(
+                guild_id=self.guild_id,
+                after=self.page_keys[-1],
+                limit=ROSTER_PAGE_SIZE + 1,
+            )
+
+        self.rows = rows[:ROSTER_PAGE_SIZE]
+        self.has_next = len(rows) > ROSTER_PAGE_SIZE
+        self.reset_container()
+
+    def reset_container(self) -> None:
+        self.clear_items()
+
+        page = len(self.page_keys)
+        if self.rows:
+            lines = [
+                f"<@{row['user_id']}>: [{row['steam_id']}]"
+                f"(https://steamcommunity.com/profiles/{row['steam_id']})"
+                for row in self.rows
+            ]
+            content = "\n".join(lines)
+        elif page == 1:
+            content = "Nobody in this server has linked a Steam account yet."
+        else:
+            content = "There are no more linked Steam accounts."
+
+        row = GuildRosterActionRow()
+        row.on_previous.disabled = page == 1
+        row.on_next.disabled = not self.has_next
+
+        container = discord.ui.Container(
+            discord.ui.TextDisplay(f"# Linked Steam Accounts\n-# Page {page}"),
+            discord.ui.TextDisplay(content),
+            discord.ui.Separator(),
+            row,
+        )
+        self.add_item(container)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.user_id
+
+
+class GuildRosterActionRow(discord.ui.ActionRow[GuildRosterView]):
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary)
+    async def on_previous(
+        self,
+        interaction: discord.Interaction,
+        button: discord.ui.Button,
+    ) -> None:
+        assert self.view is not None
+        self.view.page_keys.pop()
+        await self.view.fetch_page()
+        await interaction.response.edit_message(view=self.view)
+        self.view.set_last_interaction(interaction)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.secondary)
+    async def on_next(
+        self,
+        interaction: discord.Interaction,
+        button: discord.ui.Button,
+    ) -> None:
+        assert self.view is not None
+        last = self.view.rows[-1]
+        self.view.page_keys.append((last["user_id"], last["steam_id"]))
+        await self.view.fetch_page()
+        await interaction.response.edit_message(view=self.view)
+        self.view.set_last_interaction(interaction)
+
+    @discord.ui.button(label="Close", style=discord.ButtonStyle.secondary)
+    async def on_close(
+        self,
+        interaction: discord.Interaction,
+        button: discord.ui.Button,
+    ) -> None:
+        assert self.view is not None
+        await interaction.response.defer()
+        self.view.set_last_interaction(interaction)
+        await self.view.delete()
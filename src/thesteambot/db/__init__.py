@@ -1,3 +1,14 @@
+from .cache import DiscordOAuthCache as DiscordOAuthCache, TTLCache as TTLCache
 from .client import DatabaseClient as DatabaseClient
 from .connection import connect as connect, create_pool as create_pool
+from .events import (
+    InvalidationChannel as InvalidationChannel,
+    InvalidationListener as InvalidationListener,
+)
+from .metrics import (
+    InstrumentedConnection as InstrumentedConnection,
+    QueryMetrics as QueryMetrics,
+    QueryStats as QueryStats,
+)
+from .pool import Pool as Pool, PoolStats as PoolStats
 from .protocols import Connection as Connection, Record as Record
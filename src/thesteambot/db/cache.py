@@ -0,0 +1,74 @@
+import datetime
+import time
+from collections import OrderedDict
+from typing import Generic, TypeVar
+
+from thesteambot.db.protocols import Record
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """A bounded, least-recently-used cache whose entries expire after a TTL."""
+
+    def __init__(self, maxsize: int = 1024, *, ttl: float = 60) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: K) -> V | None:
+        item = self._items.get(key)
+        if item is None:
+            return None
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._items[key]
+            return None
+
+        self._items.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V, *, ttl: float | None = None) -> None:
+        """Cache a value, optionally overriding the default TTL for this entry."""
+        if ttl is None:
+            ttl = self.ttl
+
+        self._items[key] = (time.monotonic() + ttl, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def discard(self, key: K) -> None:
+        self._items.pop(key, None)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+
+class DiscordOAuthCache(TTLCache[int, Record]):
+    """A bounded, least-recently-used cache of discord_oauth rows by user ID.
+
+    Entries are dropped once they come within the given margin of their
+    ``expires_at`` timestamp, so any token returned by :meth:`get()` can
+    be used immediately without having to be refreshed first.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        *,
+        margin: datetime.timedelta = datetime.timedelta(seconds=60),
+    ) -> None:
+        super().__init__(maxsize)
+        self.margin = margin
+
+    def set(self, key: int, value: Record, *, ttl: float | None = None) -> None:
+        if ttl is None:
+            now = datetime.datetime.now(datetime.timezone.utc)
+            ttl = (value["expires_at"] - now - self.margin).total_seconds()
+        super().set(key, value, ttl=ttl)
@@ -1,66 +1,178 @@
 import datetime
-from typing import Sequence
+from contextlib import asynccontextmanager
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Collection,
+    Coroutine,
+    Iterable,
+    Sequence,
+)
 
+from thesteambot.db import queries
+from thesteambot.db.cache import DiscordOAuthCache
+from thesteambot.db.events import InvalidationChannel, create_payload
 from thesteambot.db.protocols import Connection, Record
 
 
 class DatabaseClient:
-    def __init__(self, conn: Connection) -> None:
+    def __init__(
+        self,
+        conn: Connection,
+        *,
+        oauth_cache: DiscordOAuthCache | None = None,
+    ) -> None:
         self.conn = conn
+        self.oauth_cache = oauth_cache
 
     async def add_discord_user(self, user_id: int) -> None:
         await self.conn.execute(
-            "INSERT INTO discord_user (user_id) VALUES ($1) ON CONFLICT DO NOTHING",
+            queries.ADD_DISCORD_USER.sql,
             user_id,
         )
 
     async def add_discord_guild(self, guild_id: int) -> None:
         await self.conn.execute(
-            "INSERT INTO discord_guild (guild_id) VALUES ($1) ON CONFLICT DO NOTHING",
+            queries.ADD_DISCORD_GUILD.sql,
             guild_id,
         )
 
+    async def delete_discord_guilds_except(
+        self,
+        guild_ids: Collection[int],
+        *,
+        limit: int,
+        shard_count: int = 1,
+        shard_ids: Collection[int] = (0,),
+    ) -> int:
+        """Delete up to ``limit`` guilds not in the given IDs.
+
+        Only guilds belonging to the given shards are considered,
+        so each cluster can clean up its own guilds independently.
+        """
+        status = await self.conn.execute(
+            queries.DELETE_DISCORD_GUILDS_EXCEPT.sql,
+            list(guild_ids),
+            limit,
+            shard_count,
+            list(shard_ids),
+        )
+        return queries.get_row_count(status)
+
     async def add_discord_channel(
         self, channel_id: int, *, guild_id: int | None
     ) -> None:
         await self.conn.execute(
-            "INSERT INTO discord_channel (channel_id, guild_id) VALUES ($1, $2) "
-            "ON CONFLICT DO NOTHING",
+            queries.ADD_DISCORD_CHANNEL.sql,
             channel_id,
             guild_id,
         )
 
+    async def delete_discord_channels(self, channel_ids: Collection[int]) -> int:
+        status = await self.conn.execute(
+            queries.DELETE_DISCORD_CHANNELS.sql,
+            list(channel_ids),
+        )
+        return queries.get_row_count(status)
+
     async def add_discord_member(self, *, guild_id: int, user_id: int) -> None:
         await self.conn.execute(
-            "INSERT INTO discord_member (guild_id, user_id) VALUES ($1, $2) "
-            "ON CONFLICT DO NOTHING",
+            queries.ADD_DISCORD_MEMBER.sql,
             guild_id,
             user_id,
         )
 
+    async def delete_discord_members(
+        self,
+        members: Collection[tuple[int, int]],
+    ) -> int:
+        """Delete the given (guild_id, user_id) pairs from discord_member."""
+        guild_ids = [guild_id for guild_id, _ in members]
+        user_ids = [user_id for _, user_id in members]
+        status = await self.conn.execute(
+            queries.DELETE_DISCORD_MEMBERS.sql,
+            guild_ids,
+            user_ids,
+        )
+        return queries.get_row_count(status)
+
+    async def sync_discord_guild(
+        self,
+        guild_id: int,
+        *,
+        user_ids: Iterable[int],
+        channel_ids: Iterable[int],
+        delete_members: bool = True,
+    ) -> None:
+        """Add the given members and channels to a guild.
+
+        Members not in ``user_ids`` are removed unless ``delete_members``
+        is false, which should be done when the members are incomplete.
+        Channels are never removed, since the given IDs can't include
+        archived threads.
+
+        This must be called inside a transaction.
+        """
+        await self.add_discord_guild(guild_id)
+
+        # Stream both sets into temporary tables with binary COPY,
+        # then reconcile them with one statement each
+        await self.conn.execute(queries.CREATE_SYNC_DISCORD_MEMBER.sql)
+        await self.conn.execute(queries.CREATE_SYNC_DISCORD_CHANNEL.sql)
+        await self.conn.copy_records_to_table(
+            "sync_discord_member",
+            records=((user_id,) for user_id in user_ids),
+        )
+        await self.conn.copy_records_to_table(
+            "sync_discord_channel",
+            records=((channel_id,) for channel_id in channel_ids),
+        )
+        await self.conn.execute(queries.ANALYZE_SYNC_DISCORD_GUILD.sql)
+
+        await self.conn.execute(queries.SYNC_ADD_DISCORD_USERS.sql)
+        await self.conn.execute(
+            queries.SYNC_ADD_DISCORD_MEMBERS.sql,
+            guild_id,
+        )
+        if delete_members:
+            await self.conn.execute(
+                queries.SYNC_DELETE_DISCORD_MEMBERS.sql,
+                guild_id,
+            )
+        await self.conn.execute(
+            queries.SYNC_ADD_DISCORD_CHANNELS.sql,
+            guild_id,
+        )
+
     async def add_steam_user(self, user_id: int) -> None:
         # Intentionally don't suppress conflicts, since this is normally
         # an explicit step users have to do
         await self.conn.execute(
-            "INSERT INTO steam_user (user_id) VALUES ($1)",
+            queries.ADD_STEAM_USER.sql,
             user_id,
         )
 
     async def delete_steam_user(self, user_id: int) -> None:
-        await self.conn.execute("DELETE FROM steam_user WHERE user_id = $1", user_id)
+        # Returns the Discord user that was linked to this account, if any
+        rows = await self.conn.fetch(queries.DELETE_STEAM_USER.sql, user_id)
+        for row in rows:
+            await self.notify(InvalidationChannel.STEAM_LINKS, row["user_id"])
 
     async def add_discord_user_steam(self, user_id: int, *, steam_id: int) -> None:
         # Intentionally don't suppress conflicts, since this is normally
         # an explicit step users have to do
         await self.conn.execute(
-            "INSERT INTO discord_user_steam (user_id, steam_id) VALUES ($1, $2)",
+            queries.ADD_DISCORD_USER_STEAM.sql,
             user_id,
             steam_id,
         )
+        await self.notify(InvalidationChannel.STEAM_LINKS, user_id)
 
     async def get_discord_user_steam(self, user_id: int) -> Sequence[Record]:
         return await self.conn.fetch(
-            "SELECT * FROM discord_user_steam WHERE user_id = $1",
+            queries.GET_DISCORD_USER_STEAM.sql,
             user_id,
         )
 
@@ -71,9 +183,44 @@ class DatabaseClient:
         steam_id: int,
     ) -> Record | None:
         return await self.conn.fetchrow(
-            "SELECT * FROM discord_user_steam WHERE user_id = $1 AND steam_id = $2",
+            queries.GET_ONE_DISCORD_USER_STEAM.sql,
+            user_id,
+            steam_id,
+        )
+
+    async def get_one_discord_steam_link(
+        self,
+        *,
+        user_id: int,
+        steam_id: int,
+        guild_id: int | None,
+    ) -> Record | None:
+        """Return when the user and (optionally) the member linked the Steam account.
+
+        The row contains ``user_created_at`` and ``member_created_at``,
+        the latter being NULL if the member link does not exist.
+        """
+        return await self.conn.fetchrow(
+            queries.GET_ONE_DISCORD_STEAM_LINK.sql,
             user_id,
             steam_id,
+            guild_id,
+        )
+
+    async def get_discord_steam_links(
+        self,
+        user_id: int,
+        *,
+        guild_id: int | None,
+    ) -> Sequence[Record]:
+        """Return every Steam account linked by the user.
+
+        See :meth:`get_one_discord_steam_link()` for the returned columns.
+        """
+        return await self.conn.fetch(
+            queries.GET_DISCORD_STEAM_LINKS.sql,
+            user_id,
+            guild_id,
         )
 
     async def add_discord_member_steam(
@@ -86,12 +233,12 @@ class DatabaseClient:
         # Intentionally don't suppress conflicts, since this is normally
         # an explicit step users have to do
         await self.conn.execute(
-            "INSERT INTO discord_member_steam (guild_id, user_id, steam_id) "
-            "VALUES ($1, $2, $3)",
+            queries.ADD_DISCORD_MEMBER_STEAM.sql,
             guild_id,
             user_id,
             steam_id,
         )
+        await self.notify(InvalidationChannel.STEAM_LINKS, user_id)
 
     async def get_discord_member_steam(
         self,
@@ -100,7 +247,7 @@ class DatabaseClient:
         user_id: int,
     ) -> Sequence[Record]:
         return await self.conn.fetch(
-            "SELECT * FROM discord_member_steam WHERE guild_id = $1 AND user_id = $2",
+            queries.GET_DISCORD_MEMBER_STEAM.sql,
             guild_id,
             user_id,
         )
@@ -113,12 +260,127 @@ class DatabaseClient:
         steam_id: int,
     ) -> Record | None:
         return await self.conn.fetchrow(
-            "SELECT * FROM discord_member_steam WHERE guild_id = $1 AND user_id = $2 AND steam_id = $3",
+            queries.GET_ONE_DISCORD_MEMBER_STEAM.sql,
             guild_id,
             user_id,
             steam_id,
         )
 
+    async def get_discord_members_by_steam(
+        self,
+        *,
+        guild_id: int,
+        steam_ids: Collection[int],
+    ) -> Sequence[Record]:
+        """Return the members linked to any of the given Steam users.
+
+        Only links made visible to the guild are returned. A Steam user
+        may be linked to more than one member.
+        """
+        return await self.conn.fetch(
+            queries.GET_DISCORD_MEMBERS_BY_STEAM.sql,
+            guild_id,
+            list(steam_ids),
+        )
+
+    def iter_discord_member_steam(
+        self,
+        *,
+        guild_id: int,
+        user_ids: Collection[int] | None = None,
+        steam_ids: Collection[int] | None = None,
+        after: tuple[int, int] = (0, 0),
+        limit: int,
+        prefetch: int | None = None,
+    ) -> AsyncIterable[Record]:
+        """Iterate over the Steam links visible to a guild using a cursor.
+
+        Links are ordered by ``(user_id, steam_id)`` and start after the
+        given key, which is the last link from the previous page.
+        They can optionally be filtered by Discord or Steam users.
+
+        This must be used inside a transaction.
+        """
+        if user_ids is not None and steam_ids is not None:
+            raise ValueError("user_ids and steam_ids are mutually exclusive")
+
+        args: list[object] = [guild_id, *after, limit]
+        if user_ids is not None:
+            query = queries.GET_DISCORD_MEMBER_STEAM_PAGE_BY_USER
+            args.append(list(user_ids))
+        elif steam_ids is not None:
+            query = queries.GET_DISCORD_MEMBER_STEAM_PAGE_BY_STEAM
+            args.append(list(steam_ids))
+        else:
+            query = queries.GET_DISCORD_MEMBER_STEAM_PAGE
+
+        return self.conn.cursor(query.sql, *args, prefetch=prefetch)
+
+    async def get_discord_member_steam_page(
+        self,
+        *,
+        guild_id: int,
+        after: tuple[int, int] = (0, 0),
+        limit: int,
+    ) -> Sequence[Record]:
+        """Return one page of the Steam links visible to a guild.
+
+        See :meth:`iter_discord_member_steam()` for how pages are ordered.
+        """
+        return await self.conn.fetch(
+            queries.GET_DISCORD_MEMBER_STEAM_PAGE.sql,
+            guild_id,
+            *after,
+            limit,
+        )
+
+    async def export_discord_member_steam(
+        self,
+        guild_id: int,
+        *,
+        output: Callable[[bytes], Coroutine[Any, Any, None]],
+    ) -> int:
+        """Write the Steam links visible to a guild as CSV with a header.
+
+        Data is passed to ``output`` as it's received from the server,
+        and the number of links written is returned.
+        """
+        status = await self.conn.copy_from_query(
+            queries.EXPORT_DISCORD_MEMBER_STEAM.sql,
+            guild_id,
+            output=output,
+            format="csv",
+            header=True,
+        )
+        return queries.get_row_count(status)
+
+    async def import_discord_member_steam(
+        self,
+        guild_id: int,
+        *,
+        links: Iterable[tuple[int, int]],
+    ) -> int:
+        """Make the given ``(user_id, steam_id)`` links visible to a guild.
+
+        Links are skipped if the user isn't a member of the guild, hasn't
+        linked the Steam account themselves, or the link already exists.
+        Returns the number of links added.
+
+        This must be called inside a transaction.
+        """
+        # Same approach as sync_discord_guild(), binary COPY
+        # into a temporary table and then one INSERT
+        await self.conn.execute(queries.CREATE_IMPORT_DISCORD_MEMBER_STEAM.sql)
+        await self.conn.copy_records_to_table(
+            "import_discord_member_steam",
+            records=links,
+        )
+        status = await self.conn.execute(
+            queries.IMPORT_DISCORD_MEMBER_STEAM.sql,
+            guild_id,
+        )
+        return queries.get_row_count(status)
+
     async def delete_discord_member_steam(
         self,
         *,
@@ -127,18 +389,53 @@ class DatabaseClient:
         steam_id: int,
     ) -> None:
         await self.conn.execute(
-            "DELETE FROM discord_member_steam "
-            "WHERE guild_id = $1 AND user_id = $2 AND steam_id = $3",
+            queries.DELETE_DISCORD_MEMBER_STEAM.sql,
             guild_id,
             user_id,
             steam_id,
         )
+        await self.notify(InvalidationChannel.STEAM_LINKS, user_id)
 
     async def get_discord_oauth(self, user_id: int) -> Record | None:
-        return await self.conn.fetchrow(
-            "SELECT * FROM discord_oauth WHERE user_id = $1",
+        row = await self.conn.fetchrow(
+            queries.GET_DISCORD_OAUTH.sql,
             user_id,
         )
+        if self.oauth_cache is not None:
+            if row is not None:
+                self.oauth_cache.set(user_id, row)
+            else:
+                self.oauth_cache.discard(user_id)
+        return row
+
+    async def get_expiring_discord_oauth(
+        self,
+        within: datetime.timedelta,
+        *,
+        limit: int,
+    ) -> Sequence[Record]:
+        return await self.conn.fetch(
+            queries.GET_EXPIRING_DISCORD_OAUTH.sql,
+            within,
+            limit,
+        )
+
+    @asynccontextmanager
+    async def lock_discord_oauth(self, user_id: int) -> AsyncIterator[None]:
+        # Session-level so it can be taken outside of transactions.
+        # If we fail to unlock, releasing the connection back to the pool
+        # will still unlock it for us.
+        await self.conn.execute(
+            queries.LOCK_DISCORD_OAUTH.sql,
+            user_id,
+        )
+        try:
+            yield
+        finally:
+            await self.conn.execute(
+                queries.UNLOCK_DISCORD_OAUTH.sql,
+                user_id,
+            )
 
     async def set_discord_oauth(
         self,
@@ -156,16 +453,8 @@ class DatabaseClient:
         expires_at = now + expires_in
 
         await self.add_discord_user(user_id)
-        await self.conn.execute(
-            "INSERT INTO discord_oauth "
-            "(user_id, access_token, token_type, expires_at, refresh_token, scope) "
-            "VALUES ($1, $2, $3, $4, $5, $6) "
-            "ON CONFLICT (user_id) DO UPDATE SET "
-            "access_token = EXCLUDED.access_token, "
-            "token_type = EXCLUDED.token_type, "
-            "expires_at = EXCLUDED.expires_at, "
-            "refresh_token = EXCLUDED.refresh_token, "
-            "scope = EXCLUDED.scope",
+        row = await self.conn.fetchrow(
+            queries.SET_DISCORD_OAUTH.sql,
             user_id,
             access_token,
             token_type,
@@ -173,9 +462,26 @@ class DatabaseClient:
             refresh_token,
             scope,
         )
+        if self.oauth_cache is not None and row is not None:
+            self.oauth_cache.set(user_id, row)
+        await self.notify(InvalidationChannel.DISCORD_OAUTH, user_id)
 
     async def delete_discord_oauth(self, user_id: int) -> None:
         await self.conn.execute(
-            "DELETE FROM discord_oauth WHERE user_id = $1",
+            queries.DELETE_DISCORD_OAUTH.sql,
             user_id,
         )
+        if self.oauth_cache is not None:
+            self.oauth_cache.discard(user_id)
+        await self.notify(InvalidationChannel.DISCORD_OAUTH, user_id)
+
+    async def notify(self, channel: InvalidationChannel, user_id: int) -> None:
+        """Tell other processes to invalidate anything they cached for a user.
+
+        Inside a transaction, this is only delivered once it commits.
+        """
+        await self.conn.execute(
+            queries.NOTIFY_INVALIDATION.sql,
+            channel,
+            create_payload(user_id),
+        )
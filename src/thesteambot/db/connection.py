@@ -1,15 +1,48 @@
 import os
 from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any, AsyncIterator
+from typing import Any, AsyncIterator, TypeVar
 
 import asyncpg
 
+from thesteambot.db.pool import Pool
+from thesteambot.db.queries import prepare_queries
+
+T = TypeVar("T")
+
 
 def _is_dockerized() -> bool:
     return Path("/.dockerenv").exists()
 
 
+def _getenv_int(key: str, default: T) -> int | T:
+    value = os.getenv(key)
+    return int(value) if value else default
+
+
+def _getenv_float(key: str, default: T) -> float | T:
+    value = os.getenv(key)
+    return float(value) if value else default
+
+
+def _get_server_settings() -> dict[str, str]:
+    # JIT compilation only slows down the short queries we typically run
+    settings = {"jit": "off"}
+
+    # e.g. DB_SERVER_SETTINGS=statement_timeout=5s,lock_timeout=1s
+    # An empty value like jit= stops a setting from being sent at all
+    for setting in os.getenv("DB_SERVER_SETTINGS", "").split(","):
+        key, sep, value = setting.partition("=")
+        if not sep:
+            continue
+        elif value.strip():
+            settings[key.strip()] = value.strip()
+        else:
+            settings.pop(key.strip(), None)
+
+    return settings
+
+
 def _get_connect_kwargs(
     *,
     host: str | None = None,
@@ -64,7 +97,14 @@ async def create_pool(
     user: str | None = None,
     password: str | None = None,
     database: str | None = None,
-) -> AsyncIterator[asyncpg.Pool]:
+    min_size: int | None = None,
+    max_size: int | None = None,
+    max_inactive_connection_lifetime: float | None = None,
+    acquire_timeout: float | None = None,
+    command_timeout: float | None = None,
+    statement_cache_size: int | None = None,
+    server_settings: dict[str, str] | None = None,
+) -> AsyncIterator[Pool]:
     connect_kwargs = _get_connect_kwargs(
         host=host,
         port=port,
@@ -72,5 +112,37 @@ async def create_pool(
         password=password,
         database=database,
     )
-    async with asyncpg.create_pool(**connect_kwargs) as pool:
-        yield pool
+
+    if min_size is None:
+        min_size = _getenv_int("DB_POOL_MIN_SIZE", 10)
+    if max_size is None:
+        max_size = _getenv_int("DB_POOL_MAX_SIZE", max(min_size, 10))
+    if max_inactive_connection_lifetime is None:
+        max_inactive_connection_lifetime = _getenv_float(
+            "DB_POOL_MAX_INACTIVE_LIFETIME",
+            300.0,
+        )
+    if acquire_timeout is None:
+        acquire_timeout = _getenv_float("DB_POOL_ACQUIRE_TIMEOUT", None)
+    if command_timeout is None:
+        command_timeout = _getenv_float("DB_COMMAND_TIMEOUT", None)
+    if statement_cache_size is None:
+        statement_cache_size = _getenv_int("DB_STATEMENT_CACHE_SIZE", 100)
+    if server_settings is None:
+        server_settings = _get_server_settings()
+
+    # With the cache disabled, queries must be sent as unnamed statements
+    # and can't be prepared upfront
+    init = prepare_queries if statement_cache_size > 0 else None
+
+    async with asyncpg.create_pool(
+        **connect_kwargs,
+        min_size=min_size,
+        max_size=max_size,
+        max_inactive_connection_lifetime=max_inactive_connection_lifetime,
+        command_timeout=command_timeout,
+        statement_cache_size=statement_cache_size,
+        server_settings=server_settings,
+        init=init,
+    ) as pool:
+        yield Pool(pool, acquire_timeout=acquire_timeout)
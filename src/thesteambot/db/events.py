@@ -0,0 +1,107 @@
+import asyncio
+import enum
+import logging
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Protocol
+
+from thesteambot.db.pool import Pool
+
+log = logging.getLogger(__name__)
+
+# Identifies notifications sent by this process so we can ignore our own
+ORIGIN = uuid.uuid4().hex
+
+
+class InvalidationChannel(enum.StrEnum):
+    DISCORD_OAUTH = "thesteambot_discord_oauth"
+    STEAM_LINKS = "thesteambot_steam_links"
+
+
+class InvalidatedCache(Protocol):
+    def discard(self, user_id: int, /) -> None: ...
+    def clear(self) -> None: ...
+
+
+def create_payload(user_id: int) -> str:
+    return f"{ORIGIN}:{user_id}"
+
+
+class InvalidationListener:
+    """Invalidates per-user caches when another process notifies us of a change.
+
+    Notifications are sent by :class:`~thesteambot.db.DatabaseClient`
+    write methods, so they are only delivered once their transaction commits.
+    If the listening connection is lost, every subscribed cache is cleared
+    since we may have missed notifications in the meantime.
+    """
+
+    def __init__(self, *, retry_interval: float = 5) -> None:
+        self.retry_interval = retry_interval
+        self._caches: dict[InvalidationChannel, list[InvalidatedCache]] = {
+            channel: [] for channel in InvalidationChannel
+        }
+
+    def subscribe(self, channel: InvalidationChannel, cache: InvalidatedCache) -> None:
+        self._caches[channel].append(cache)
+
+    @asynccontextmanager
+    async def listen(self, pool: Pool) -> AsyncIterator[None]:
+        task = asyncio.create_task(self._listen_forever(pool))
+        try:
+            yield
+        finally:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _listen_forever(self, pool: Pool) -> None:
+        while True:
+            try:
+                await self._listen(pool)
+            except Exception:
+                log.exception("Invalidation listener failed")
+
+            self._clear_all()
+            await asyncio.sleep(self.retry_interval)
+
+    async def _listen(self, pool: Pool) -> None:
+        terminated = asyncio.Event()
+
+        def on_termination(conn: object) -> None:
+            log.warning("Invalidation listener connection was lost")
+            terminated.set()
+
+        async with pool.acquire() as conn:
+            conn.add_termination_listener(on_termination)
+            try:
+                for channel in InvalidationChannel:
+                    await conn.add_listener(channel, self._on_notification)
+
+                # Anything cached while we weren't listening could be stale
+                self._clear_all()
+                await terminated.wait()
+            finally:
+                conn.remove_termination_listener(on_termination)
+
+    def _on_notification(
+        self,
+        conn: object,
+        pid: int,
+        channel: str,
+        payload: object,
+    ) -> None:
+        assert isinstance(payload, str)
+        origin, _, user_id = payload.partition(":")
+        if origin == ORIGIN:
+            return
+
+        for cache in self._caches[InvalidationChannel(channel)]:
+            cache.discard(int(user_id))
+
+    def _clear_all(self) -> None:
+        for caches in self._caches.values():
+            for cache in caches:
+                cache.clear()
@@ -0,0 +1,199 @@
+import logging
+import math
+import os
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Coroutine,
+    Iterable,
+    Iterator,
+    Literal,
+    Sequence,
+)
+
+from thesteambot.db.protocols import Connection, Record
+from thesteambot.db.queries import get_queries, get_row_count
+
+log = logging.getLogger(__name__)
+
+# Upper bounds of each histogram bucket, in seconds
+BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    math.inf,
+)
+
+
+class QueryStats:
+    """A latency histogram and row count for one query."""
+
+    __slots__ = ("name", "count", "rows", "total", "buckets")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.count = 0
+        self.rows = 0
+        self.total = 0.0
+        self.buckets = [0] * len(BUCKETS)
+
+    def observe(self, duration: float, rows: int) -> None:
+        self.count += 1
+        self.rows += rows
+        self.total += duration
+        for i, bound in enumerate(BUCKETS):
+            if duration <= bound:
+                self.buckets[i] += 1
+                break
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Return the upper bound of the bucket containing the given quantile."""
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.buckets):
+            seen += count
+            if seen >= target and seen > 0:
+                return bound
+        return 0.0
+
+
+class QueryMetrics:
+    """Collects query statistics, labelled by the name of each registered query.
+
+    Since queries are registered under the name of the
+    :class:`~thesteambot.db.DatabaseClient` method running them,
+    this tells us which client methods are responsible for slow queries.
+    """
+
+    def __init__(self, *, slow_query_threshold: float | None = None) -> None:
+        if slow_query_threshold is None:
+            value = os.getenv("DB_SLOW_QUERY_THRESHOLD")
+            slow_query_threshold = float(value) if value else 0.5
+
+        self.slow_query_threshold = slow_query_threshold
+
+        # Pre-allocate everything so observing a query is only a dict lookup
+        queries = get_queries()
+        self._names = {query.sql: query.name for query in queries}
+        self._names["copy_records_to_table"] = "copy_records_to_table"
+        self.reset()
+
+    def __iter__(self) -> Iterator[QueryStats]:
+        return iter(self.stats.values())
+
+    def observe(self, query: str, start: float, rows: int) -> None:
+        duration = time.perf_counter() - start
+        name = self._names.get(query, "unregistered")
+        self.stats[name].observe(duration, rows)
+
+        if duration >= self.slow_query_threshold:
+            log.warning(
+                "Slow query name=%s duration=%.3fs rows=%d",
+                name,
+                duration,
+                rows,
+            )
+
+    def reset(self) -> None:
+        names = set(self._names.values())
+        names.add("unregistered")
+        self.stats = {name: QueryStats(name) for name in sorted(names)}
+
+
+class InstrumentedConnection:
+    """Wraps a connection to record statistics on every query it runs."""
+
+    def __init__(self, conn: Connection, metrics: QueryMetrics) -> None:
+        self.conn = conn
+        self.metrics = metrics
+
+    async def execute(self, query: str, /, *args: object) -> str:
+        start = time.perf_counter()
+        status = await self.conn.execute(query, *args)
+        self.metrics.observe(query, start, get_row_count(status))
+        return status
+
+    async def fetch(self, query: str, /, *args: object) -> Sequence[Record]:
+        start = time.perf_counter()
+        rows = await self.conn.fetch(query, *args)
+        self.metrics.observe(query, start, len(rows))
+        return rows
+
+    async def fetchrow(self, query: str, /, *args: object) -> Record | None:
+        start = time.perf_counter()
+        row = await self.conn.fetchrow(query, *args)
+        self.metrics.observe(query, start, row is not None)
+        return row
+
+    async def fetchval(self, query: str, /, *args: object) -> Any:
+        start = time.perf_counter()
+        value = await self.conn.fetchval(query, *args)
+        self.metrics.observe(query, start, 1)
+        return value
+
+    async def cursor(
+        self,
+        query: str,
+        /,
+        *args: object,
+        prefetch: int | None = None,
+    ) -> AsyncIterator[Record]:
+        # Cursors are observed once exhausted, including the time spent
+        # by the consumer between each batch of rows
+        start = time.perf_counter()
+        rows = 0
+        async for row in self.conn.cursor(query, *args, prefetch=prefetch):
+            rows += 1
+            yield row
+        self.metrics.observe(query, start, rows)
+
+    async def copy_from_query(
+        self,
+        query: str,
+        /,
+        *args: object,
+        output: Callable[[bytes], Coroutine[Any, Any, None]],
+        format: Literal["text", "csv", "binary"] | None = None,
+        header: bool | None = None,
+    ) -> str:
+        start = time.perf_counter()
+        status = await self.conn.copy_from_query(
+            query,
+            *args,
+            output=output,
+            format=format,
+            header=header,
+        )
+        self.metrics.observe(query, start, get_row_count(status))
+        return status
+
+    async def copy_records_to_table(
+        self,
+        table_name: str,
+        *,
+        records: Iterable[Sequence[object]],
+        columns: Iterable[str] | None = None,
+    ) -> str:
+        start = time.perf_counter()
+        status = await self.conn.copy_records_to_table(
+            table_name,
+            records=records,
+            columns=columns,
+        )
+        self.metrics.observe("copy_records_to_table", start, get_row_count(status))
+        return status
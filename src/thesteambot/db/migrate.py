@@ -1,9 +1,11 @@
 import argparse
 import asyncio
 import importlib.resources
+import contextlib
 import re
 import sys
-from typing import Iterable, NamedTuple, Self
+import time
+from typing import AsyncIterator, Iterable, NamedTuple, Self
 
 import asyncpg
 
@@ -12,6 +14,12 @@ from thesteambot.db.connection import connect
 assert __package__ is not None
 package = importlib.resources.files(__package__)
 
+# An arbitrary key shared by every migrator, so only one runs at a time
+ADVISORY_LOCK_KEY = 0x7465616D626F74
+
+_STATEMENT_PATTERN = re.compile(r";[ \t]*$", re.MULTILINE)
+_COMMENT_PATTERN = re.compile(r"--.*$", re.MULTILINE)
+
 
 def main() -> None:
     asyncio.run(async_main())
@@ -45,8 +53,28 @@ async def run_default_migrations(conn: asyncpg.Connection) -> None:
 
 
 class Migration(NamedTuple):
+    """A migration script.
+
+    Scripts normally run inside a transaction. A script containing
+    a ``-- migrate: no-transaction`` line instead runs each statement
+    on its own, which is required by ``CREATE INDEX CONCURRENTLY``.
+    Such statements should be separated by a semicolon at the end of
+    a line, and should be safe to re-run in case a previous attempt
+    failed partway, e.g. by dropping an invalid index beforehand.
+    """
+
     version: int
     sql: str
+    transaction: bool = True
+
+    def statements(self) -> list[str]:
+        """Split the script into individual statements."""
+        statements = []
+        for statement in _STATEMENT_PATTERN.split(self.sql):
+            code = _COMMENT_PATTERN.sub("", statement)
+            if code.strip():
+                statements.append(statement.strip())
+        return statements
 
 
 class Migrations(tuple[Migration, ...]):
@@ -64,6 +92,10 @@ class Migrations(tuple[Migration, ...]):
 
 class MigrationFinder:
     _FILE_PATTERN = re.compile(r"(\d+)-(.+)\.sql")
+    _NO_TRANSACTION_PATTERN = re.compile(
+        r"^--\s*migrate:\s*no-transaction\s*$",
+        re.MULTILINE,
+    )
 
     def discover(self) -> Migrations:
         migrations: list[Migration] = [Migration(version=-1, sql="")]
@@ -81,7 +113,10 @@ class MigrationFinder:
 
             version = int(m[1])
             sql = file.read_text("utf-8")
-            migrations.append(Migration(version=version, sql=sql))
+            transaction = self._NO_TRANSACTION_PATTERN.search(sql) is None
+            migrations.append(
+                Migration(version=version, sql=sql, transaction=transaction)
+            )
 
         return Migrations.from_iterable_unsorted(migrations)
 
@@ -91,17 +126,66 @@ class Migrator:
         self.conn = conn
 
     async def run_migrations(self, migrations: Migrations) -> None:
-        version = await self.get_version()
-        if version > 0 and not migrations.version_exists(version):
-            sys.exit(f"Unrecognized database version: {version}")
+        # Avoid waiting on the lock when there's nothing to do, which is
+        # the usual case when several migrators start up together
+        if not await self.has_pending_migrations(migrations):
             return
 
-        async with self.conn.transaction():
-            for version, script in migrations.after_version(version):
-                print(f"Migrating database to v{version}")
-                await self.conn.execute(script)
+        async with self.lock():
+            version = await self.get_version()
+            _check_version(migrations, version)
+
+            start = time.perf_counter()
+            pending = migrations.after_version(version)
+            for migration in pending:
+                await self.run_migration(migration)
+
+            if pending:
+                elapsed = time.perf_counter() - start
+                print(f"Applied {len(pending)} migration(s) in {elapsed:.2f}s")
+
+    async def run_migration(self, migration: Migration) -> None:
+        # Each migration is committed along with its version, so a failure
+        # keeps any progress made up to that point
+        start = time.perf_counter()
+        print(f"Migrating database to v{migration.version}")
+
+        if migration.transaction:
+            async with self.conn.transaction():
+                await self.conn.execute(migration.sql)
+                await self.set_version(migration.version)
+        else:
+            for statement in migration.statements():
+                step_start = time.perf_counter()
+                await self.conn.execute(statement)
+                elapsed = time.perf_counter() - step_start
+                print(f"  {_summarize(statement)} ({elapsed:.2f}s)")
+            await self.set_version(migration.version)
+
+        elapsed = time.perf_counter() - start
+        print(f"Migrated database to v{migration.version} in {elapsed:.2f}s")
+
+    async def has_pending_migrations(self, migrations: Migrations) -> bool:
+        try:
+            version = await self.conn.fetchval("SELECT version FROM schema_version")
+        except asyncpg.UndefinedTableError:
+            return True
 
-            await self.conn.execute("UPDATE schema_version SET version = $1", version)
+        assert isinstance(version, int)
+        _check_version(migrations, version)
+        return len(migrations.after_version(version)) > 0
+
+    @contextlib.asynccontextmanager
+    async def lock(self) -> AsyncIterator[None]:
+        """Hold an advisory lock so concurrent migrators run one at a time."""
+        await self.conn.execute("SELECT pg_advisory_lock($1)", ADVISORY_LOCK_KEY)
+        try:
+            yield
+        finally:
+            await self.conn.execute("SELECT pg_advisory_unlock($1)", ADVISORY_LOCK_KEY)
+
+    async def set_version(self, version: int) -> None:
+        await self.conn.execute("UPDATE schema_version SET version = $1", version)
 
     async def get_version(self) -> int:
         try:
@@ -118,5 +202,19 @@ class Migrator:
         return version
 
 
+def _check_version(migrations: Migrations, version: int) -> None:
+    if version > 0 and not migrations.version_exists(version):
+        sys.exit(f"Unrecognized database version: {version}")
+
+
+def _summarize(statement: str) -> str:
+    lines = (line.strip() for line in statement.splitlines())
+    code = [line for line in lines if line and not line.startswith("--")]
+    summary = " ".join(code)
+    if len(summary) > 72:
+        summary = summary[:69] + "..."
+    return summary
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,4 @@
+-- migrate: no-transaction
+-- Used for finding tokens that are about to expire
+DROP INDEX CONCURRENTLY IF EXISTS ix_discord_oauth_expires_at;
+CREATE INDEX CONCURRENTLY ix_discord_oauth_expires_at ON discord_oauth (expires_at);
@@ -0,0 +1,5 @@
+-- migrate: no-transaction
+-- Used for finding which members are linked to a set of Steam users
+DROP INDEX CONCURRENTLY IF EXISTS ix_discord_member_steam_steam_id;
+CREATE INDEX CONCURRENTLY ix_discord_member_steam_steam_id
+    ON discord_member_steam (guild_id, steam_id) INCLUDE (user_id);
@@ -0,0 +1,81 @@
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, NamedTuple
+
+import asyncpg
+from asyncpg.pool import PoolConnectionProxy
+
+
+class PoolStats(NamedTuple):
+    size: int
+    idle_size: int
+    min_size: int
+    max_size: int
+    acquires: int
+    acquire_timeouts: int
+    acquire_wait_total: float
+    acquire_wait_max: float
+
+    @property
+    def acquire_wait_mean(self) -> float:
+        if self.acquires == 0:
+            return 0.0
+        return self.acquire_wait_total / self.acquires
+
+
+class Pool:
+    """Wraps an asyncpg pool to keep statistics on acquiring connections."""
+
+    def __init__(
+        self,
+        pool: asyncpg.Pool,
+        *,
+        acquire_timeout: float | None = None,
+    ) -> None:
+        self.pool = pool
+        self.acquire_timeout = acquire_timeout
+        self.reset_stats()
+
+    @asynccontextmanager
+    async def acquire(
+        self,
+        *,
+        timeout: float | None = None,
+    ) -> AsyncIterator[PoolConnectionProxy]:
+        if timeout is None:
+            timeout = self.acquire_timeout
+
+        start = time.perf_counter()
+        try:
+            conn = await self.pool.acquire(timeout=timeout)
+        except TimeoutError:
+            self._acquire_timeouts += 1
+            raise
+        finally:
+            wait = time.perf_counter() - start
+            self._acquires += 1
+            self._acquire_wait_total += wait
+            self._acquire_wait_max = max(self._acquire_wait_max, wait)
+
+        try:
+            yield conn
+        finally:
+            await self.pool.release(conn)
+
+    def get_stats(self) -> PoolStats:
+        return PoolStats(
+            size=self.pool.get_size(),
+            idle_size=self.pool.get_idle_size(),
+            min_size=self.pool.get_min_size(),
+            max_size=self.pool.get_max_size(),
+            acquires=self._acquires,
+            acquire_timeouts=self._acquire_timeouts,
+            acquire_wait_total=self._acquire_wait_total,
+            acquire_wait_max=self._acquire_wait_max,
+        )
+
+    def reset_stats(self) -> None:
+        self._acquires = 0
+        self._acquire_timeouts = 0
+        self._acquire_wait_total = 0.0
+        self._acquire_wait_max = 0.0
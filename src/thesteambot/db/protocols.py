@@ -1,4 +1,16 @@
-from typing import Any, Iterator, Protocol, Sequence, TypeVar, overload
+from typing import (
+    Any,
+    AsyncIterable,
+    Callable,
+    Coroutine,
+    Iterable,
+    Iterator,
+    Literal,
+    Protocol,
+    Sequence,
+    TypeVar,
+    overload,
+)
 
 T = TypeVar("T")
 
@@ -28,3 +40,26 @@ class Connection(Protocol):
     async def fetch(self, query: str, /, *args: object) -> Sequence[Record]: ...
     async def fetchrow(self, query: str, /, *args: object) -> Record | None: ...
     async def fetchval(self, query: str, /, *args: object) -> Any: ...
+    def cursor(
+        self,
+        query: str,
+        /,
+        *args: object,
+        prefetch: int | None = None,
+    ) -> AsyncIterable[Record]: ...
+    async def copy_from_query(
+        self,
+        query: str,
+        /,
+        *args: object,
+        output: Callable[[bytes], Coroutine[Any, Any, None]],
+        format: Literal["text", "csv", "binary"] | None = None,
+        header: bool | None = None,
+    ) -> str: ...
+    async def copy_records_to_table(
+        self,
+        table_name: str,
+        *,
+        records: Iterable[Sequence[object]],
+        columns: Iterable[str] | None = None,
+    ) -> str: ...
@@ -0,0 +1,320 @@
+from typing import NamedTuple
+
+import asyncpg
+
+
+class Query(NamedTuple):
+    name: str
+    sql: str
+    prepare: bool = True
+
+
+_queries: dict[str, Query] = {}
+
+
+def register(name: str, sql: str, *, prepare: bool = True) -> Query:
+    """Register a query to be run by :class:`~thesteambot.db.DatabaseClient`.
+
+    Queries that cannot be prepared ahead of time, like those referencing
+    temporary tables, should set ``prepare=False``.
+    """
+    if name in _queries:
+        raise ValueError(f"Query {name!r} is already registered")
+
+    query = Query(name=name, sql=sql, prepare=prepare)
+    _queries[name] = query
+    return query
+
+
+def get_queries() -> tuple[Query, ...]:
+    return tuple(_queries.values())
+
+
+def get_row_count(status: str) -> int:
+    """Return the number of rows affected from a command status string."""
+    # e.g. "DELETE 10" or "INSERT 0 10", but not "CREATE TABLE"
+    _, _, count = status.rpartition(" ")
+    return int(count) if count.isdigit() else 0
+
+
+async def prepare_queries(conn: asyncpg.Connection) -> None:
+    """Prepare every registered query in the connection's statement cache.
+
+    Since queries are looked up in the cache by their text, this removes
+    the parse/plan round trip on their first use with each connection.
+    Do not use this when the statement cache is disabled, such as with
+    pgbouncer in transaction mode, as each statement would be left
+    prepared on the server under a unique name.
+    """
+    for query in get_queries():
+        if query.prepare:
+            # Connection.prepare() bypasses the statement cache, so we have
+            # to use the method it delegates to
+            await conn._prepare(query.sql, use_cache=True)  # type: ignore
+
+
+ADD_DISCORD_USER = register(
+    "add_discord_user",
+    "INSERT INTO discord_user (user_id) VALUES ($1) ON CONFLICT DO NOTHING",
+)
+
+ADD_DISCORD_GUILD = register(
+    "add_discord_guild",
+    "INSERT INTO discord_guild (guild_id) VALUES ($1) ON CONFLICT DO NOTHING",
+)
+
+DELETE_DISCORD_GUILDS_EXCEPT = register(
+    "delete_discord_guilds_except",
+    "DELETE FROM discord_guild WHERE guild_id IN ("
+    "SELECT guild_id FROM discord_guild g WHERE NOT EXISTS "
+    "(SELECT 1 FROM unnest($1::bigint[]) s (guild_id) WHERE s.guild_id = g.guild_id) "
+    "AND (guild_id >> 22) % $3 = ANY($4::int[]) LIMIT $2)",
+)
+
+ADD_DISCORD_CHANNEL = register(
+    "add_discord_channel",
+    "INSERT INTO discord_channel (channel_id, guild_id) VALUES ($1, $2) "
+    "ON CONFLICT DO NOTHING",
+)
+
+DELETE_DISCORD_CHANNELS = register(
+    "delete_discord_channels",
+    "DELETE FROM discord_channel WHERE channel_id = ANY($1::bigint[])",
+)
+
+ADD_DISCORD_MEMBER = register(
+    "add_discord_member",
+    "INSERT INTO discord_member (guild_id, user_id) VALUES ($1, $2) "
+    "ON CONFLICT DO NOTHING",
+)
+
+DELETE_DISCORD_MEMBERS = register(
+    "delete_discord_members",
+    "DELETE FROM discord_member WHERE (guild_id, user_id) IN "
+    "(SELECT * FROM unnest($1::bigint[], $2::bigint[]))",
+)
+
+CREATE_SYNC_DISCORD_MEMBER = register(
+    "create_sync_discord_member",
+    "CREATE TEMPORARY TABLE sync_discord_member "
+    "(user_id BIGINT NOT NULL) ON COMMIT DROP",
+    prepare=False,
+)
+
+CREATE_SYNC_DISCORD_CHANNEL = register(
+    "create_sync_discord_channel",
+    "CREATE TEMPORARY TABLE sync_discord_channel "
+    "(channel_id BIGINT NOT NULL) ON COMMIT DROP",
+    prepare=False,
+)
+
+ANALYZE_SYNC_DISCORD_GUILD = register(
+    "analyze_sync_discord_guild",
+    "ANALYZE sync_discord_member, sync_discord_channel",
+    prepare=False,
+)
+
+SYNC_ADD_DISCORD_USERS = register(
+    "sync_add_discord_users",
+    "INSERT INTO discord_user (user_id) "
+    "SELECT user_id FROM sync_discord_member "
+    "ON CONFLICT DO NOTHING",
+    prepare=False,
+)
+
+SYNC_ADD_DISCORD_MEMBERS = register(
+    "sync_add_discord_members",
+    "INSERT INTO discord_member (guild_id, user_id) "
+    "SELECT $1, user_id FROM sync_discord_member "
+    "ON CONFLICT DO NOTHING",
+    prepare=False,
+)
+
+SYNC_DELETE_DISCORD_MEMBERS = register(
+    "sync_delete_discord_members",
+    "DELETE FROM discord_member m WHERE guild_id = $1 AND NOT EXISTS "
+    "(SELECT 1 FROM sync_discord_member s WHERE s.user_id = m.user_id)",
+    prepare=False,
+)
+
+SYNC_ADD_DISCORD_CHANNELS = register(
+    "sync_add_discord_channels",
+    "INSERT INTO discord_channel (channel_id, guild_id) "
+    "SELECT channel_id, $1 FROM sync_discord_channel "
+    "ON CONFLICT DO NOTHING",
+    prepare=False,
+)
+
+ADD_STEAM_USER = register(
+    "add_steam_user",
+    "INSERT INTO steam_user (user_id) VALUES ($1)",
+)
+
+DELETE_STEAM_USER = register(
+    "delete_steam_user",
+    "WITH deleted AS (DELETE FROM steam_user WHERE user_id = $1) "
+    "SELECT user_id FROM discord_user_steam WHERE steam_id = $1",
+)
+
+ADD_DISCORD_USER_STEAM = register(
+    "add_discord_user_steam",
+    "INSERT INTO discord_user_steam (user_id, steam_id) VALUES ($1, $2)",
+)
+
+GET_DISCORD_USER_STEAM = register(
+    "get_discord_user_steam",
+    "SELECT * FROM discord_user_steam WHERE user_id = $1",
+)
+
+GET_ONE_DISCORD_USER_STEAM = register(
+    "get_one_discord_user_steam",
+    "SELECT * FROM discord_user_steam WHERE user_id = $1 AND steam_id = $2",
+)
+
+GET_ONE_DISCORD_STEAM_LINK = register(
+    "get_one_discord_steam_link",
+    "SELECT u.steam_id, "
+    "u.created_at AS user_created_at, "
+    "m.created_at AS member_created_at "
+    "FROM discord_user_steam u "
+    "LEFT JOIN discord_member_steam m ON m.guild_id = $3 "
+    "AND m.user_id = u.user_id AND m.steam_id = u.steam_id "
+    "WHERE u.user_id = $1 AND u.steam_id = $2",
+)
+
+GET_DISCORD_STEAM_LINKS = register(
+    "get_discord_steam_links",
+    "SELECT u.steam_id, "
+    "u.created_at AS user_created_at, "
+    "m.created_at AS member_created_at "
+    "FROM discord_user_steam u "
+    "LEFT JOIN discord_member_steam m ON m.guild_id = $2 "
+    "AND m.user_id = u.user_id AND m.steam_id = u.steam_id "
+    "WHERE u.user_id = $1",
+)
+
+ADD_DISCORD_MEMBER_STEAM = register(
+    "add_discord_member_steam",
+    "INSERT INTO discord_member_steam (guild_id, user_id, steam_id) "
+    "VALUES ($1, $2, $3)",
+)
+
+GET_DISCORD_MEMBER_STEAM = register(
+    "get_discord_member_steam",
+    "SELECT * FROM discord_member_steam WHERE guild_id = $1 AND user_id = $2",
+)
+
+GET_ONE_DISCORD_MEMBER_STEAM = register(
+    "get_one_discord_member_steam",
+    "SELECT * FROM discord_member_steam WHERE guild_id = $1 AND user_id = $2 AND steam_id = $3",
+)
+
+GET_DISCORD_MEMBERS_BY_STEAM = register(
+    "get_discord_members_by_steam",
+    "SELECT steam_id, user_id FROM discord_member_steam "
+    "WHERE guild_id = $1 AND steam_id = ANY($2::bigint[])",
+)
+
+# Keyset pagination over (user_id, steam_id), matching the primary key
+GET_DISCORD_MEMBER_STEAM_PAGE = register(
+    "get_discord_member_steam_page",
+    "SELECT user_id, steam_id, created_at FROM discord_member_steam "
+    "WHERE guild_id = $1 AND (user_id, steam_id) > ($2, $3) "
+    "ORDER BY user_id, steam_id LIMIT $4",
+)
+
+GET_DISCORD_MEMBER_STEAM_PAGE_BY_USER = register(
+    "get_discord_member_steam_page_by_user",
+    "SELECT user_id, steam_id, created_at FROM discord_member_steam "
+    "WHERE guild_id = $1 AND (user_id, steam_id) > ($2, $3) "
+    "AND user_id = ANY($5::bigint[]) "
+    "ORDER BY user_id, steam_id LIMIT $4",
+)
+
+GET_DISCORD_MEMBER_STEAM_PAGE_BY_STEAM = register(
+    "get_discord_member_steam_page_by_steam",
+    "SELECT user_id, steam_id, created_at FROM discord_member_steam "
+    "WHERE guild_id = $1 AND (user_id, steam_id) > ($2, $3) "
+    "AND steam_id = ANY($5::bigint[]) "
+    "ORDER BY user_id, steam_id LIMIT $4",
+)
+
+# Run through COPY, which can't use prepared statements
+EXPORT_DISCORD_MEMBER_STEAM = register(
+    "export_discord_member_steam",
+    "SELECT user_id, steam_id, created_at FROM discord_member_steam "
+    "WHERE guild_id = $1 ORDER BY user_id, steam_id",
+    prepare=False,
+)
+
+CREATE_IMPORT_DISCORD_MEMBER_STEAM = register(
+    "create_import_discord_member_steam",
+    "CREATE TEMPORARY TABLE import_discord_member_steam "
+    "(user_id BIGINT NOT NULL, steam_id BIGINT NOT NULL) ON COMMIT DROP",
+    prepare=False,
+)
+
+# Only members who have linked the Steam account themselves can be imported
+IMPORT_DISCORD_MEMBER_STEAM = register(
+    "import_discord_member_steam",
+    "INSERT INTO discord_member_steam (guild_id, user_id, steam_id) "
+    "SELECT m.guild_id, i.user_id, i.steam_id "
+    "FROM import_discord_member_steam i "
+    "JOIN discord_member m ON m.guild_id = $1 AND m.user_id = i.user_id "
+    "JOIN discord_user_steam u "
+    "ON u.user_id = i.user_id AND u.steam_id = i.steam_id "
+    "ON CONFLICT DO NOTHING",
+    prepare=False,
+)
+
+DELETE_DISCORD_MEMBER_STEAM = register(
+    "delete_discord_member_steam",
+    "DELETE FROM discord_member_steam "
+    "WHERE guild_id = $1 AND user_id = $2 AND steam_id = $3",
+)
+
+GET_DISCORD_OAUTH = register(
+    "get_discord_oauth",
+    "SELECT * FROM discord_oauth WHERE user_id = $1",
+)
+
+GET_EXPIRING_DISCORD_OAUTH = register(
+    "get_expiring_discord_oauth",
+    "SELECT * FROM discord_oauth "
+    "WHERE expires_at < CURRENT_TIMESTAMP + $1 "
+    "ORDER BY expires_at LIMIT $2",
+)
+
+LOCK_DISCORD_OAUTH = register(
+    "lock_discord_oauth",
+    "SELECT pg_advisory_lock(hashtextextended('discord_oauth', $1))",
+)
+
+UNLOCK_DISCORD_OAUTH = register(
+    "unlock_discord_oauth",
+    "SELECT pg_advisory_unlock(hashtextextended('discord_oauth', $1))",
+)
+
+SET_DISCORD_OAUTH = register(
+    "set_discord_oauth",
+    "INSERT INTO discord_oauth "
+    "(user_id, access_token, token_type, expires_at, refresh_token, scope) "
+    "VALUES ($1, $2, $3, $4, $5, $6) "
+    "ON CONFLICT (user_id) DO UPDATE SET "
+    "access_token = EXCLUDED.access_token, "
+    "token_type = EXCLUDED.token_type, "
+    "expires_at = EXCLUDED.expires_at, "
+    "refresh_token = EXCLUDED.refresh_token, "
+    "scope = EXCLUDED.scope "
+    "RETURNING *",
+)
+
+DELETE_DISCORD_OAUTH = register(
+    "delete_discord_oauth",
+    "DELETE FROM discord_oauth WHERE user_id = $1",
+)
+
+NOTIFY_INVALIDATION = register(
+    "notify_invalidation",
+    "SELECT pg_notify($1, $2)",
+)
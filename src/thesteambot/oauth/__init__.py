@@ -1,10 +1,20 @@
+from .client import (
+    AccessToken as AccessToken,
+    DiscordConnection as DiscordConnection,
+    DiscordOAuthClient as DiscordOAuthClient,
+    DiscordUser as DiscordUser,
+    DiscordUserClient as DiscordUserClient,
+)
 from .errors import (
+    DiscordHTTPError as DiscordHTTPError,
     DiscordOAuthError as DiscordOAuthError,
     ExpiredDiscordOAuthError as ExpiredDiscordOAuthError,
     MissingDiscordOAuthError as MissingDiscordOAuthError,
+    UnauthorizedError as UnauthorizedError,
 )
 from .rest import (
     acquire_rest_client as acquire_rest_client,
+    get_access_token as get_access_token,
     maybe_refresh_access_token as maybe_refresh_access_token,
     refresh_access_token as refresh_access_token,
     revoke_access_token as revoke_access_token,
@@ -0,0 +1,243 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, NamedTuple, Self
+
+import httpx
+
+from thesteambot.oauth.errors import DiscordHTTPError, UnauthorizedError
+
+log = logging.getLogger(__name__)
+
+API_BASE_URL = "https://discord.com/api/v10"
+
+
+class AccessToken(NamedTuple):
+    access_token: str
+    token_type: str
+    expires_in: float
+    refresh_token: str
+    scope: str
+
+
+class DiscordUser(NamedTuple):
+    id: int
+    username: str
+    global_name: str | None
+
+
+class DiscordConnection(NamedTuple):
+    type: str
+    id: str
+    name: str
+    visibility: int
+
+
+class _Bucket:
+    __slots__ = ("remaining", "reset_at")
+
+    def __init__(self) -> None:
+        self.remaining = 1
+        self.reset_at = 0.0
+
+
+class DiscordOAuthClient:
+    """A minimal Discord client for the OAuth2 endpoints we use.
+
+    All requests share one HTTP/2 connection pool. Rate limit buckets are
+    tracked per endpoint and token from Discord's response headers, and
+    requests wait for their bucket to reset rather than running into 429s.
+    """
+
+    def __init__(
+        self,
+        *,
+        client_id: int | None = None,
+        client_secret: str | None = None,
+        base_url: str = API_BASE_URL,
+        max_retries: int = 3,
+    ) -> None:
+        if client_id is None:
+            client_id = int(os.environ["DISCORD_CLIENT_ID"])
+        if client_secret is None:
+            client_secret = os.environ["DISCORD_CLIENT_SECRET"]
+
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.max_retries = max_retries
+        self.http = httpx.AsyncClient(
+            base_url=base_url,
+            http2=True,
+            timeout=10,
+        )
+
+        # Endpoints are mapped to buckets, which are separate for each token
+        self._route_buckets: dict[str, str] = {}
+        self._buckets: dict[tuple[str, str], _Bucket] = {}
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        await self.http.aclose()
+
+    async def refresh_access_token(self, refresh_token: str) -> AccessToken:
+        response = await self._request(
+            "POST",
+            "/oauth2/token",
+            auth=(str(self.client_id), self.client_secret),
+            data={"grant_type": "refresh_token", "refresh_token": refresh_token},
+        )
+        data = response.json()
+        return AccessToken(
+            access_token=data["access_token"],
+            token_type=data["token_type"],
+            expires_in=data["expires_in"],
+            refresh_token=data["refresh_token"],
+            scope=data["scope"],
+        )
+
+    async def revoke_access_token(self, access_token: str) -> None:
+        await self._request(
+            "POST",
+            "/oauth2/token/revoke",
+            auth=(str(self.client_id), self.client_secret),
+            data={"token": access_token, "token_type_hint": "access_token"},
+        )
+
+    async def fetch_my_user(self, access_token: str, token_type: str) -> DiscordUser:
+        response = await self._request(
+            "GET",
+            "/users/@me",
+            headers={"Authorization": f"{token_type} {access_token}"},
+        )
+        data = response.json()
+        return DiscordUser(
+            id=int(data["id"]),
+            username=data["username"],
+            global_name=data.get("global_name"),
+        )
+
+    async def fetch_my_connections(
+        self,
+        access_token: str,
+        token_type: str,
+    ) -> list[DiscordConnection]:
+        response = await self._request(
+            "GET",
+            "/users/@me/connections",
+            headers={"Authorization": f"{token_type} {access_token}"},
+        )
+        return [
+            DiscordConnection(
+                type=c["type"],
+                id=c["id"],
+                name=c["name"],
+                visibility=c["visibility"],
+            )
+            for c in response.json()
+        ]
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        *,
+        headers: dict[str, str] | None = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        route = f"{method} {path}"
+        # Tokens are rate limited separately, and we have no other
+        # major parameters to worry about
+        if headers is not None and "Authorization" in headers:
+            token_key = headers["Authorization"]
+        else:
+            token_key = ""
+
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_bucket(route, token_key)
+            response = await self.http.request(method, path, headers=headers, **kwargs)
+            self._update_bucket(route, token_key, response.headers)
+
+            if response.status_code == 429 and attempt < self.max_retries:
+                retry_after = float(response.headers.get("Retry-After", 1))
+                log.warning("Rate limited on %s, retrying in %.2fs", route, retry_after)
+                await asyncio.sleep(retry_after)
+                continue
+            elif response.status_code == 401:
+                raise UnauthorizedError(response.status_code, response.text)
+            elif response.is_error:
+                raise DiscordHTTPError(response.status_code, response.text)
+            return response
+
+        raise AssertionError("unreachable")
+
+    async def _wait_for_bucket(self, route: str, token_key: str) -> None:
+        bucket_hash = self._route_buckets.get(route)
+        if bucket_hash is None:
+            return
+
+        bucket = self._buckets.get((bucket_hash, token_key))
+        if bucket is None:
+            return
+
+        delay = bucket.reset_at - time.monotonic()
+        if bucket.remaining <= 0 and delay > 0:
+            await asyncio.sleep(delay)
+        bucket.remaining -= 1
+
+    def _update_bucket(
+        self, route: str, token_key: str, headers: httpx.Headers
+    ) -> None:
+        bucket_hash = headers.get("X-RateLimit-Bucket")
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset_after = headers.get("X-RateLimit-Reset-After")
+        if bucket_hash is None or remaining is None or reset_after is None:
+            return
+
+        self._route_buckets[route] = bucket_hash
+        bucket = self._buckets.get((bucket_hash, token_key))
+        if bucket is None:
+            self._prune_buckets()
+            bucket = self._buckets[bucket_hash, token_key] = _Bucket()
+
+        bucket.remaining = int(remaining)
+        bucket.reset_at = time.monotonic() + float(reset_after)
+
+    def _prune_buckets(self, maxsize: int = 10_000) -> None:
+        # Every user token gets its own buckets, so forget the ones
+        # that have already reset
+        if len(self._buckets) < maxsize:
+            return
+
+        now = time.monotonic()
+        for key, bucket in list(self._buckets.items()):
+            if bucket.reset_at <= now:
+                del self._buckets[key]
+
+
+class DiscordUserClient:
+    """A :class:`DiscordOAuthClient` bound to one user's access token."""
+
+    def __init__(
+        self,
+        oauth: DiscordOAuthClient,
+        access_token: str,
+        token_type: str,
+    ) -> None:
+        self.oauth = oauth
+        self.access_token = access_token
+        self.token_type = token_type
+
+    async def fetch_my_user(self) -> DiscordUser:
+        return await self.oauth.fetch_my_user(self.access_token, self.token_type)
+
+    async def fetch_my_connections(self) -> list[DiscordConnection]:
+        return await self.oauth.fetch_my_connections(
+            self.access_token,
+            self.token_type,
+        )
@@ -18,3 +18,16 @@ class ExpiredDiscordOAuthError(DiscordOAuthError):
 
     def __init__(self, user_id: int) -> None:
         super().__init__(user_id, "Authorization expired for user")
+
+
+class DiscordHTTPError(Exception):
+    """Raised when Discord responds to a request with an error."""
+
+    def __init__(self, status: int, body: str) -> None:
+        super().__init__(f"Discord responded with {status}: {body}")
+        self.status = status
+        self.body = body
+
+
+class UnauthorizedError(DiscordHTTPError):
+    """Raised when Discord rejects the access token used in a request."""
@@ -1,32 +1,45 @@
 from __future__ import annotations
 
+import asyncio
 import datetime
-import os
 from contextlib import AbstractAsyncContextManager, asynccontextmanager
 from typing import AsyncIterator, Callable
 
-import hikari
-from hikari.impl import RESTClientImpl
-
 from thesteambot.db import DatabaseClient
-from thesteambot.oauth import (
+from thesteambot.oauth.client import DiscordOAuthClient, DiscordUserClient
+from thesteambot.oauth.errors import (
+    DiscordHTTPError,
     DiscordOAuthError,
     ExpiredDiscordOAuthError,
     MissingDiscordOAuthError,
+    UnauthorizedError,
 )
 
+# Refreshes currently in progress, used to merge concurrent refreshes
+_pending_refreshes: dict[int, asyncio.Future[tuple[str, str]]] = {}
+
 
 async def acquire_rest_client(
-    rest: hikari.RESTApp,
+    oauth: DiscordOAuthClient,
+    db_client: DatabaseClient,
+    user_id: int,
+) -> DiscordUserClient:
+    access_token, token_type = await get_access_token(oauth, db_client, user_id)
+    return DiscordUserClient(oauth, access_token, token_type)
+
+
+async def get_access_token(
+    oauth: DiscordOAuthClient,
     db_client: DatabaseClient,
     user_id: int,
-) -> RESTClientImpl:
+) -> tuple[str, str]:
+    """Return the user's access token and token type, refreshing it if needed."""
     row = await db_client.get_discord_oauth(user_id)
     if row is None:
         raise MissingDiscordOAuthError(user_id)
 
-    access_token, token_type = await maybe_refresh_access_token(
-        rest,
+    return await maybe_refresh_access_token(
+        oauth,
         db_client,
         user_id,
         access_token=row["access_token"],
@@ -36,11 +49,9 @@ async def acquire_rest_client(
         scope=row["scope"],
     )
 
-    return rest.acquire(access_token, token_type)
-
 
 async def maybe_refresh_access_token(
-    rest: hikari.RESTApp,
+    oauth: DiscordOAuthClient,
     db_client: DatabaseClient,
     user_id: int,
     *,
@@ -55,7 +66,7 @@ async def maybe_refresh_access_token(
         return access_token, token_type
 
     return await refresh_access_token(
-        rest,
+        oauth,
         db_client,
         user_id,
         access_token=access_token,
@@ -66,7 +77,7 @@ async def maybe_refresh_access_token(
 
 
 async def refresh_access_token(
-    rest: hikari.RESTApp,
+    oauth: DiscordOAuthClient,
     db_client: DatabaseClient,
     user_id: int,
     *,
@@ -75,22 +86,105 @@ async def refresh_access_token(
     refresh_token: str,
     scope: str,
 ) -> tuple[str, str]:
-    client_id = int(os.environ["DISCORD_CLIENT_ID"])
-    client_secret = os.environ["DISCORD_CLIENT_SECRET"]
-    async with rest.acquire(access_token, token_type) as client:
+    """Refresh the user's access token and return the new token and token type.
+
+    Concurrent refreshes for the same user in this process share a single
+    request, while an advisory lock serializes refreshes across processes.
+    """
+    while (future := _pending_refreshes.get(user_id)) is not None:
         try:
-            token = await client.refresh_access_token(
-                client_id,
-                client_secret,
-                refresh_token,
-            )
-        except hikari.ClientHTTPResponseError as e:
-            await db_client.delete_discord_oauth(user_id)
-            message = "Failed to refresh access token for user"
-            raise DiscordOAuthError(user_id, message) from e
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+            # Whoever started the refresh was cancelled, so try taking over
+
+    future = asyncio.get_running_loop().create_future()
+    future.add_done_callback(_retrieve_exception)
+    _pending_refreshes[user_id] = future
+    try:
+        result = await _refresh_access_token_locked(
+            oauth,
+            db_client,
+            user_id,
+            access_token=access_token,
+            token_type=token_type,
+            refresh_token=refresh_token,
+            scope=scope,
+        )
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    except BaseException:
+        future.cancel()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        del _pending_refreshes[user_id]
+
+
+def _retrieve_exception(future: asyncio.Future) -> None:
+    # Avoid "exception was never retrieved" when nobody else was waiting
+    if not future.cancelled():
+        future.exception()
+
+
+async def _refresh_access_token_locked(
+    oauth: DiscordOAuthClient,
+    db_client: DatabaseClient,
+    user_id: int,
+    *,
+    access_token: str,
+    token_type: str,
+    refresh_token: str,
+    scope: str,
+) -> tuple[str, str]:
+    async with db_client.lock_discord_oauth(user_id):
+        # Another process may have refreshed the token while we were waiting,
+        # in which case our refresh token has already been used up
+        row = await db_client.get_discord_oauth(user_id)
+        if row is None:
+            raise MissingDiscordOAuthError(user_id)
+        elif row["refresh_token"] != refresh_token:
+            return row["access_token"], row["token_type"]
+
+        return await _refresh_access_token(
+            oauth,
+            db_client,
+            user_id,
+            access_token=access_token,
+            token_type=token_type,
+            refresh_token=refresh_token,
+            scope=scope,
+        )
+
+
+async def _refresh_access_token(
+    oauth: DiscordOAuthClient,
+    db_client: DatabaseClient,
+    user_id: int,
+    *,
+    access_token: str,
+    token_type: str,
+    refresh_token: str,
+    scope: str,
+) -> tuple[str, str]:
+    try:
+        token = await oauth.refresh_access_token(refresh_token)
+    except DiscordHTTPError as e:
+        # Only an invalid grant means the authorization is gone for good,
+        # anything else like 5xx or persistent 429s may be transient
+        if e.status not in (400, 401):
+            raise
+
+        await db_client.delete_discord_oauth(user_id)
+        message = "Failed to refresh access token for user"
+        raise DiscordOAuthError(user_id, message) from e
 
     old_scopes = set(scope.split())
-    new_scopes = set(str(s) for s in token.scopes)
+    new_scopes = set(token.scope.split())
     missing_scopes = old_scopes - new_scopes
     if missing_scopes:
         missing = ", ".join(sorted(new_scopes))
@@ -101,17 +195,16 @@ async def refresh_access_token(
     await db_client.set_discord_oauth(
         user_id,
         access_token=token.access_token,
-        token_type=str(token.token_type),
+        token_type=token.token_type,
         expires_in=token.expires_in,
-        # HACK: hikari hints refresh_token as int
-        refresh_token=str(token.refresh_token),
+        refresh_token=token.refresh_token,
         scope=" ".join(sorted(new_scopes)),
     )
-    return token.access_token, str(token.token_type)
+    return token.access_token, token.token_type
 
 
 async def revoke_access_token(
-    rest: hikari.RESTApp,
+    oauth: DiscordOAuthClient,
     db_client: DatabaseClient,
     user_id: int,
 ) -> None:
@@ -119,45 +212,34 @@ async def revoke_access_token(
     if row is None:
         raise MissingDiscordOAuthError(user_id)
 
-    client_id = int(os.environ["DISCORD_CLIENT_ID"])
-    client_secret = os.environ["DISCORD_CLIENT_SECRET"]
-
-    access_token = row["access_token"]
-    token_type = row["token_type"]
-    async with rest.acquire(access_token, token_type) as client:
-        try:
-            await client.revoke_access_token(
-                client_id,
-                client_secret,
-                access_token,
-            )
-        except hikari.ClientHTTPResponseError as e:
-            await db_client.delete_discord_oauth(user_id)
-            message = "Failed to revoke access token for user"
-            raise DiscordOAuthError(user_id, message) from e
-        else:
-            await db_client.delete_discord_oauth(user_id)
+    try:
+        await oauth.revoke_access_token(row["access_token"])
+    except DiscordHTTPError as e:
+        await db_client.delete_discord_oauth(user_id)
+        message = "Failed to revoke access token for user"
+        raise DiscordOAuthError(user_id, message) from e
+    else:
+        await db_client.delete_discord_oauth(user_id)
 
 
 @asynccontextmanager
 async def wrap_rest_client(
     acquire_db_client: Callable[[], AbstractAsyncContextManager[DatabaseClient]],
-    client: RESTClientImpl,
+    client: DiscordUserClient,
     user_id: int,
-) -> AsyncIterator[RESTClientImpl]:
-    async with client:
-        try:
-            yield client
-        except hikari.UnauthorizedError as e:
-            # FIXME: Improve Discord OAuth invalidation for 401 responses
-            #
-            # We don't have enough information in this error to know if it
-            # was our client that threw the error, or a different client.
-            # For example, if we entered two clients and the outer client
-            # received 401, the inner-most client would be the first to hit
-            # this try-except. As a result, we may end up invalidating someone
-            # else's login even though they weren't the one that caused the 401.
-            async with acquire_db_client() as db_client:
-                await db_client.delete_discord_oauth(user_id)
-
-            raise ExpiredDiscordOAuthError(user_id) from e
+) -> AsyncIterator[DiscordUserClient]:
+    try:
+        yield client
+    except UnauthorizedError as e:
+        # FIXME: Improve Discord OAuth invalidation for 401 responses
+        #
+        # We don't have enough information in this error to know if it
+        # was our client that threw the error, or a different client.
+        # For example, if we entered two clients and the outer client
+        # received 401, the inner-most client would be the first to hit
+        # this try-except. As a result, we may end up invalidating someone
+        # else's login even though they weren't the one that caused the 401.
+        async with acquire_db_client() as db_client:
+            await db_client.delete_discord_oauth(user_id)
+
+        raise ExpiredDiscordOAuthError(user_id) from e
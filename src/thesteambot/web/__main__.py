@@ -1,10 +1,45 @@
-from thesteambot.web.app import app
+import math
+import os
+
+# Keep in sync with the defaults in thesteambot.db.connection
+DEFAULT_POOL_MIN_SIZE = 10
+DEFAULT_POOL_MAX_SIZE = 10
+# Each pool needs at least one connection for listening to invalidations
+# and one for handling requests
+MIN_WORKER_POOL_SIZE = 2
 
 
 def main() -> None:
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0")
+    workers = int(os.getenv("WEB_WORKERS") or 1)
+    if workers > 1:
+        # Each worker has its own pool, so split the connections between them
+        _divide_pool_sizes(workers)
+
+    uvicorn.run(
+        # Workers import the app themselves, so it has to be given by name
+        "thesteambot.web.app:app",
+        host="0.0.0.0",
+        workers=workers,
+        loop=os.getenv("WEB_LOOP") or "auto",
+        http=os.getenv("WEB_HTTP") or "auto",
+        timeout_keep_alive=int(os.getenv("WEB_KEEP_ALIVE_TIMEOUT") or 5),
+        backlog=int(os.getenv("WEB_BACKLOG") or 2048),
+    )
+
+
+def _divide_pool_sizes(workers: int) -> None:
+    # Resolve the totals the same way create_pool() would before splitting
+    min_size = int(os.getenv("DB_POOL_MIN_SIZE") or DEFAULT_POOL_MIN_SIZE)
+    max_size = int(
+        os.getenv("DB_POOL_MAX_SIZE") or max(min_size, DEFAULT_POOL_MAX_SIZE)
+    )
+
+    worker_min_size = max(MIN_WORKER_POOL_SIZE, math.ceil(min_size / workers))
+    worker_max_size = max(worker_min_size, math.ceil(max_size / workers))
+    os.environ["DB_POOL_MIN_SIZE"] = str(worker_min_size)
+    os.environ["DB_POOL_MAX_SIZE"] = str(worker_max_size)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,283 @@
+"""Bulk lookups of the Steam links visible to each guild.
+
+Every endpoint requires an API key from WEB_API_KEYS, given as
+``Authorization: Bearer <key>``. Links are streamed as newline-delimited
+JSON, one object per line:
+
+    {"user_id": "...", "steam_id": "...", "created_at": "..."}
+
+When a page is full, a final ``{"next": "<token>"}`` line is written,
+which can be passed as the ``after`` query parameter to continue.
+
+A guild's links can also be downloaded in full as CSV from ``links.csv``.
+"""
+
+import asyncio
+import base64
+import binascii
+import hmac
+import json
+from typing import Any, AsyncIterator, Callable, Coroutine, Iterable, TypeVar
+
+from pydantic import BaseModel, Field, ValidationError
+from starlette.authentication import (
+    AuthCredentials,
+    AuthenticationBackend,
+    AuthenticationError,
+    SimpleUser,
+    requires,
+)
+from starlette.config import Config
+from starlette.datastructures import CommaSeparatedStrings
+from starlette.exceptions import HTTPException
+from starlette.middleware import Middleware
+from starlette.middleware.authentication import AuthenticationMiddleware
+from starlette.requests import HTTPConnection, Request
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from thesteambot.db import DatabaseClient, InstrumentedConnection, Record
+from thesteambot.web.lifespan import cast_state
+
+M = TypeVar("M", bound=BaseModel)
+
+config = Config()
+WEB_API_KEYS = config("WEB_API_KEYS", cast=CommaSeparatedStrings, default="")
+
+MAX_BODY_SIZE = 1024 * 1024
+MAX_LOOKUP_IDS = 10_000
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 100_000
+# Rows fetched from the cursor and written to the response at a time
+CHUNK_SIZE = 500
+# Chunks of COPY output buffered before waiting on the client
+COPY_QUEUE_SIZE = 16
+
+
+class APIKeyBackend(AuthenticationBackend):
+    def __init__(self, keys: Iterable[str]) -> None:
+        self.keys = [key.encode() for key in keys if key]
+
+    async def authenticate(
+        self,
+        conn: HTTPConnection,
+    ) -> tuple[AuthCredentials, SimpleUser] | None:
+        authorization = conn.headers.get("Authorization")
+        if authorization is None:
+            return None
+
+        scheme, _, key = authorization.partition(" ")
+        if scheme.lower() != "bearer":
+            raise AuthenticationError("Unsupported authorization scheme")
+
+        # Compare against every key so timing doesn't reveal which one matched
+        matches = [hmac.compare_digest(key.encode(), k) for k in self.keys]
+        if not any(matches):
+            raise AuthenticationError("Invalid API key")
+
+        return AuthCredentials(["api"]), SimpleUser("api")
+
+
+def on_auth_error(conn: HTTPConnection, exc: Exception) -> Response:
+    return PlainTextResponse(str(exc), status_code=401)
+
+
+class DiscordUserLookup(BaseModel):
+    user_ids: list[int] = Field(max_length=MAX_LOOKUP_IDS)
+
+
+class SteamUserLookup(BaseModel):
+    steam_ids: list[int] = Field(max_length=MAX_LOOKUP_IDS)
+
+
+@requires("api", status_code=401)
+async def get_guild_links(request: Request) -> Response:
+    return stream_links(request)
+
+
+@requires("api", status_code=401)
+async def lookup_discord_links(request: Request) -> Response:
+    lookup = await read_model(request, DiscordUserLookup)
+    return stream_links(request, user_ids=lookup.user_ids)
+
+
+@requires("api", status_code=401)
+async def lookup_steam_links(request: Request) -> Response:
+    lookup = await read_model(request, SteamUserLookup)
+    return stream_links(request, steam_ids=lookup.steam_ids)
+
+
+@requires("api", status_code=401)
+async def export_guild_links(request: Request) -> Response:
+    guild_id: int = request.path_params["guild_id"]
+    state = cast_state(request)
+
+    async def export(output: Callable[[bytes], Coroutine[Any, Any, None]]) -> None:
+        async with state.pool.acquire() as conn:
+            client = DatabaseClient(InstrumentedConnection(conn, state.query_metrics))
+            await client.export_discord_member_steam(guild_id, output=output)
+
+    filename = f"steam-links-{guild_id}.csv"
+    return StreamingResponse(
+        stream_copy(export),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+async def stream_copy(
+    copy: Callable[
+        [Callable[[bytes], Coroutine[Any, Any, None]]],
+        Coroutine[Any, Any, None],
+    ],
+) -> AsyncIterator[bytes]:
+    """Yield the output of a COPY as it's written.
+
+    COPY pushes its output to a callback, so it runs in a separate task
+    which waits whenever the client falls behind.
+    """
+    queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=COPY_QUEUE_SIZE)
+    task = asyncio.create_task(copy(queue.put))
+    get: asyncio.Task[bytes] | None = None
+    try:
+        while True:
+            get = asyncio.create_task(queue.get())
+            await asyncio.wait((get, task), return_when=asyncio.FIRST_COMPLETED)
+            if not get.done():
+                break
+            yield get.result()
+
+        get.cancel()
+        while not queue.empty():
+            yield queue.get_nowait()
+        # Propagate any error from the COPY
+        await task
+    finally:
+        # Stop the COPY if the client disconnected
+        if get is not None:
+            get.cancel()
+        task.cancel()
+
+
+def stream_links(request: Request, **filters: Any) -> Response:
+    guild_id: int = request.path_params["guild_id"]
+    after = request.query_params.get("after")
+    after = decode_page_token(after) if after else (0, 0)
+    limit = get_page_size(request)
+    state = cast_state(request)
+
+    async def stream() -> AsyncIterator[bytes]:
+        # The connection is held until the response is fully sent,
+        # which is why pages are limited in size
+        async with state.pool.acquire() as conn, conn.transaction(readonly=True):
+            client = DatabaseClient(InstrumentedConnection(conn, state.query_metrics))
+            rows = client.iter_discord_member_steam(
+                guild_id=guild_id,
+                after=after,
+                limit=limit,
+                prefetch=min(limit, CHUNK_SIZE),
+                **filters,
+            )
+
+            count = 0
+            last: Record | None = None
+            chunk: list[bytes] = []
+            async for row in rows:
+                chunk.append(dump_line(serialize_link(row)))
+                count += 1
+                last = row
+
+                if len(chunk) >= CHUNK_SIZE:
+                    yield b"".join(chunk)
+                    chunk.clear()
+
+        if last is not None and count >= limit:
+            token = encode_page_token(last["user_id"], last["steam_id"])
+            chunk.append(dump_line({"next": token}))
+        if chunk:
+            yield b"".join(chunk)
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+async def read_model(request: Request, model: type[M]) -> M:
+    """Read and validate a JSON request body, limited to MAX_BODY_SIZE."""
+    content_length = request.headers.get("Content-Length")
+    if content_length is not None:
+        if not content_length.isdigit():
+            raise HTTPException(400, "Invalid Content-Length")
+        if int(content_length) > MAX_BODY_SIZE:
+            raise HTTPException(413)
+
+    # Chunked requests don't have a length, so count as we go
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > MAX_BODY_SIZE:
+            raise HTTPException(413)
+
+    try:
+        return model.model_validate_json(body)
+    except ValidationError as e:
+        raise HTTPException(422, str(e)) from None
+
+
+def get_page_size(request: Request) -> int:
+    limit = request.query_params.get("limit")
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    elif not limit.isdigit() or not 0 < int(limit) <= MAX_PAGE_SIZE:
+        raise HTTPException(400, f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return int(limit)
+
+
+def encode_page_token(user_id: int, steam_id: int) -> str:
+    token = base64.urlsafe_b64encode(f"{user_id}:{steam_id}".encode())
+    return token.rstrip(b"=").decode()
+
+
+def decode_page_token(token: str) -> tuple[int, int]:
+    padding = "=" * (-len(token) % 4)
+    try:
+        key = base64.urlsafe_b64decode(token + padding).decode()
+        user_id, steam_id = key.split(":")
+        return int(user_id), int(steam_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(400, "Invalid page token") from None
+
+
+def serialize_link(row: Record) -> dict[str, Any]:
+    # IDs are strings since they can exceed JavaScript's integer precision
+    return {
+        "user_id": str(row["user_id"]),
+        "steam_id": str(row["steam_id"]),
+        "created_at": row["created_at"].isoformat(),
+    }
+
+
+def dump_line(obj: object) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode() + b"\n"
+
+
+middleware = [
+    Middleware(
+        AuthenticationMiddleware,
+        backend=APIKeyBackend(WEB_API_KEYS),
+        on_error=on_auth_error,
+    ),
+]
+
+routes = [
+    Route("/guilds/{guild_id:int}/links", get_guild_links),
+    Route("/guilds/{guild_id:int}/links.csv", export_guild_links),
+    Route(
+        "/guilds/{guild_id:int}/links/discord",
+        lookup_discord_links,
+        methods=["POST"],
+    ),
+    Route(
+        "/guilds/{guild_id:int}/links/steam",
+        lookup_steam_links,
+        methods=["POST"],
+    ),
+]
@@ -1,5 +1,3 @@
-import importlib.resources
-
 from starlette.applications import Starlette
 from starlette.config import Config
 from starlette.datastructures import Secret
@@ -10,23 +8,19 @@ from starlette.middleware.trustedhost import TrustedHostMiddleware
 from starlette.requests import Request
 from starlette.responses import Response
 from starlette.routing import Mount, Route
-from starlette.staticfiles import StaticFiles
 
-from thesteambot.web import auth, login
+from thesteambot.web import api, auth, login
 from thesteambot.web.lifespan import lifespan
-from thesteambot.web.templating import templates
+from thesteambot.web.templating import cached_template_response, assets
 
 config = Config()
 DEBUG = config("DEBUG") not in ("", "0")
 DOMAIN = config("DOMAIN")
 WEB_SECRET_KEY = config("WEB_SECRET_KEY", cast=Secret)
 
-assert __package__ is not None
-package = importlib.resources.files(__package__)
-
 
 def homepage(request: Request) -> Response:
-    return templates.TemplateResponse(request, "index.j2")
+    return cached_template_response(request, "index.j2")
 
 
 allowed_hosts = [DOMAIN]
@@ -38,13 +32,10 @@ app = Starlette(
     lifespan=lifespan,
     routes=[
         Route("/", homepage),
+        Mount("/api", name="api", routes=api.routes, middleware=api.middleware),
         Mount("/auth", name="auth", routes=auth.routes),
         Mount("/login", name="login", routes=login.routes),
-        Mount(
-            "/static",
-            name="static",
-            app=StaticFiles(directory=str(package.joinpath("static"))),
-        ),
+        Mount("/static", name="static", app=assets),
     ],
     middleware=[
         Middleware(CORSMiddleware),
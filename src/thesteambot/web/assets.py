@@ -0,0 +1,189 @@
+import gzip
+import hashlib
+import logging
+import mimetypes
+from importlib.abc import Traversable
+from typing import Any, Iterator, NamedTuple
+
+import jinja2
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+try:
+    import brotli  # type: ignore
+except ImportError:
+    brotli = None
+
+log = logging.getLogger(__name__)
+
+# Compressed encodings we can serve, most preferred first.
+# Brotli is only used if installed, e.g. with the speedups extra.
+ENCODINGS = ("br", "gzip")
+
+
+class Asset(NamedTuple):
+    media_type: str
+    digest: str
+    # Content for each encoding, keyed by the encoding's name
+    variants: dict[str, bytes]
+
+
+class StaticAssets:
+    """Serves static files from memory with fingerprinted URLs.
+
+    Every file is read, hashed and compressed once at startup. Files are
+    then available under a fingerprinted path like ``css/main.1a2b3c4d.css``,
+    which is cached by browsers indefinitely since its content can never
+    change, and under their original path which browsers must revalidate.
+    Use :meth:`url_for()` in templates to link to fingerprinted paths.
+
+    With ``reload=True``, files are re-read on every request for development.
+    """
+
+    def __init__(self, directory: Traversable, *, reload: bool = False) -> None:
+        self.directory = directory
+        self.reload = reload
+        self.load()
+
+    def load(self) -> None:
+        """(Re-)load every file from the directory."""
+        self.fingerprints: dict[str, str] = {}
+        self._assets: dict[str, Asset] = {}
+        self._immutable: set[str] = set()
+
+        for path, file in _walk(self.directory):
+            asset = _create_asset(path, file.read_bytes())
+            fingerprinted = _fingerprint(path, asset.digest)
+            self.fingerprints[path] = fingerprinted
+            self._assets[path] = asset
+            self._assets[fingerprinted] = asset
+            self._immutable.add(fingerprinted)
+
+        log.debug("Loaded %d static assets", len(self.fingerprints))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        assert scope["type"] == "http"
+
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+        if self.reload:
+            self.load()
+
+        path = scope["path"].removeprefix(scope.get("root_path", "")).lstrip("/")
+        asset = self._assets.get(path)
+        if asset is None:
+            raise HTTPException(status_code=404)
+
+        request_headers = Headers(scope=scope)
+        encoding = _negotiate_encoding(asset, request_headers)
+        etag = f'"{asset.digest}-{encoding}"'
+        headers = {
+            "ETag": etag,
+            "Vary": "Accept-Encoding",
+        }
+        if path in self._immutable:
+            headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            headers["Cache-Control"] = "no-cache"
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+
+        if etag_matches(etag, request_headers):
+            response = Response(status_code=304, headers=headers)
+        else:
+            content = asset.variants[encoding]
+            if scope["method"] == "HEAD":
+                headers["Content-Length"] = str(len(content))
+                content = b""
+            response = Response(
+                content,
+                headers=headers,
+                media_type=asset.media_type,
+            )
+
+        await response(scope, receive, send)
+
+    def url_for(self, request: Request, path: str) -> str:
+        path = path.lstrip("/")
+        path = self.fingerprints.get(path, path)
+        return str(request.url_for("static", path="/" + path))
+
+    def install(self, env: jinja2.Environment) -> None:
+        """Add a ``static_url(path)`` global to the given Jinja environment."""
+
+        @jinja2.pass_context
+        def static_url(context: dict[str, Any], path: str) -> str:
+            return self.url_for(context["request"], path)
+
+        env.globals["static_url"] = static_url
+
+
+def _walk(
+    directory: Traversable, prefix: str = ""
+) -> Iterator[tuple[str, Traversable]]:
+    for child in sorted(directory.iterdir(), key=lambda child: child.name):
+        path = prefix + child.name
+        if child.is_dir():
+            yield from _walk(child, path + "/")
+        elif child.is_file():
+            yield path, child
+
+
+def _create_asset(path: str, content: bytes) -> Asset:
+    media_type, _ = mimetypes.guess_type(path)
+    if media_type is None:
+        media_type = "application/octet-stream"
+
+    compressed = {"gzip": gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        compressed["br"] = brotli.compress(content, quality=11)
+
+    variants = {"identity": content}
+    for encoding, data in compressed.items():
+        # Don't bother serving variants that ended up larger
+        if len(data) < len(content):
+            variants[encoding] = data
+
+    digest = hashlib.sha256(content).hexdigest()[:16]
+    return Asset(media_type=media_type, digest=digest, variants=variants)
+
+
+def _fingerprint(path: str, digest: str) -> str:
+    head, sep, name = path.rpartition("/")
+    stem, dot, suffix = name.partition(".")
+    return f"{head}{sep}{stem}.{digest[:8]}{dot}{suffix}"
+
+
+def _negotiate_encoding(asset: Asset, headers: Headers) -> str:
+    accepted: dict[str, float] = {}
+    for value in headers.get("Accept-Encoding", "").split(","):
+        name, _, params = value.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+
+        quality = 1.0
+        key, _, q = params.partition("=")
+        if key.strip() == "q":
+            try:
+                quality = float(q)
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+
+    for encoding in ENCODINGS:
+        if encoding in asset.variants and accepted.get(encoding, 0) > 0:
+            return encoding
+    return "identity"
+
+
+def etag_matches(etag: str, headers: Headers) -> bool:
+    if_none_match = headers.get("If-None-Match")
+    if if_none_match is None:
+        return False
+
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in tags or "*" in tags
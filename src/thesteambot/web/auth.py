@@ -4,9 +4,10 @@ from starlette.requests import Request
 from starlette.responses import Response
 from starlette.routing import Route
 
-from thesteambot.db import DatabaseClient
+from thesteambot.db import DatabaseClient, InstrumentedConnection
 from thesteambot.web.lifespan import cast_state
 from thesteambot.web.oauth import oauth
+from thesteambot.web.session import set_discord_user
 from thesteambot.web.templating import templates
 
 
@@ -32,12 +33,16 @@ async def authorize_discord(request: Request) -> Response:
         return templates.TemplateResponse(request, page, context=context)
 
     state = cast_state(request)
-    client = state.hikari_rest.acquire(token.access_token, token.token_type)
-    async with client:
-        user = await client.fetch_my_user()
+    user = await state.discord_oauth.fetch_my_user(
+        token.access_token,
+        token.token_type,
+    )
 
     async with state.pool.acquire() as conn, conn.transaction():
-        client = DatabaseClient(conn)
+        client = DatabaseClient(
+            InstrumentedConnection(conn, state.query_metrics),
+            oauth_cache=state.oauth_cache,
+        )
         await client.set_discord_oauth(
             user.id,
             access_token=token.access_token,
@@ -47,7 +52,7 @@ async def authorize_discord(request: Request) -> Response:
             scope=token.scope,
         )
 
-    request.session["discord-user-id"] = user.id
+    set_discord_user(request, user.id)
     context["success"] = True
     return templates.TemplateResponse(request, page, context=context)
 
@@ -1,32 +1,53 @@
 from contextlib import asynccontextmanager
 from typing import Any, AsyncIterator, cast
 
-import asyncpg
-import hikari
 from starlette.applications import Starlette
 from starlette.requests import Request
 
-from thesteambot.db import create_pool
+from thesteambot.db import (
+    DiscordOAuthCache,
+    InvalidationChannel,
+    InvalidationListener,
+    Pool,
+    QueryMetrics,
+    create_pool,
+)
+from thesteambot.oauth import DiscordOAuthClient
+from thesteambot.web.templating import compile_templates
 
 
 class State:
-    hikari_rest: hikari.RESTApp
-    pool: asyncpg.Pool
+    discord_oauth: DiscordOAuthClient
+    pool: Pool
+    oauth_cache: DiscordOAuthCache
+    query_metrics: QueryMetrics
+    invalidations: InvalidationListener
 
 
 @asynccontextmanager
 async def lifespan(app: Starlette) -> AsyncIterator[dict[str, Any]]:
-    hikari_rest = hikari.RESTApp()
-    await hikari_rest.start()
-
-    async with create_pool() as pool:
+    compile_templates()
+
+    # Keep our caches consistent with writes from the bot
+    oauth_cache = DiscordOAuthCache()
+    invalidations = InvalidationListener()
+    invalidations.subscribe(InvalidationChannel.DISCORD_OAUTH, oauth_cache)
+
+    # With multiple workers, each process runs this separately
+    # and gets its own HTTP client and pool
+    async with (
+        DiscordOAuthClient() as discord_oauth,
+        create_pool() as pool,
+        invalidations.listen(pool),
+    ):
         yield {
-            "hikari_rest": hikari_rest,
+            "discord_oauth": discord_oauth,
             "pool": pool,
+            "oauth_cache": oauth_cache,
+            "query_metrics": QueryMetrics(),
+            "invalidations": invalidations,
         }
 
-    await hikari_rest.close()
-
 
 def cast_state(request: Request) -> State:
     return cast(State, request.state)
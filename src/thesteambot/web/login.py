@@ -2,9 +2,10 @@ from starlette.requests import Request
 from starlette.responses import RedirectResponse, Response
 from starlette.routing import Route
 
-from thesteambot.db import DatabaseClient
+from thesteambot.db import DatabaseClient, InstrumentedConnection
 from thesteambot.web.lifespan import cast_state
 from thesteambot.web.oauth import oauth
+from thesteambot.web.session import has_discord_auth_hint, set_discord_auth_hint
 
 
 async def login_discord(request: Request) -> Response:
@@ -22,18 +23,33 @@ async def login_discord(request: Request) -> Response:
             prompt="none",
         )
 
+    # The bot links here with ?reauthorize=1 after the user's authorization
+    # was lost, which a recent session hint wouldn't know about
+    if "reauthorize" in request.query_params:
+        return await authorize_redirect()
+
     user_id = request.session.get("discord-user-id")
     if user_id is None:
         return await authorize_redirect()
 
+    if has_discord_auth_hint(request):
+        return RedirectResponse(request.url_for("homepage"))
+
     state = cast_state(request)
-    async with state.pool.acquire() as conn:
-        client = DatabaseClient(conn)
-        row = await client.get_discord_oauth(user_id)
+    row = state.oauth_cache.get(user_id)
+    if row is None:
+        async with state.pool.acquire() as conn:
+            client = DatabaseClient(
+                InstrumentedConnection(conn, state.query_metrics),
+                oauth_cache=state.oauth_cache,
+            )
+            row = await client.get_discord_oauth(user_id)
 
     if row is None:
         return await authorize_redirect()
 
+    set_discord_auth_hint(request)
+
     # FIXME: show page or toast indicating they're already authenticated
     return RedirectResponse(request.url_for("homepage"))
 
@@ -0,0 +1,21 @@
+import time
+
+from starlette.requests import Request
+
+# How long we trust the session to say the user is authorized
+# before checking the database again
+AUTH_HINT_TTL = 300
+
+
+def set_discord_user(request: Request, user_id: int) -> None:
+    request.session["discord-user-id"] = user_id
+    set_discord_auth_hint(request)
+
+
+def set_discord_auth_hint(request: Request) -> None:
+    request.session["discord-authorized-until"] = int(time.time()) + AUTH_HINT_TTL
+
+
+def has_discord_auth_hint(request: Request) -> bool:
+    authorized_until = request.session.get("discord-authorized-until")
+    return authorized_until is not None and authorized_until > time.time()
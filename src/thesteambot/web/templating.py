@@ -1,8 +1,87 @@
+import hashlib
 import importlib.resources
+import logging
+import os
+import time
+from typing import NamedTuple
 
+import jinja2
+from starlette.requests import Request
+from starlette.responses import Response
 from starlette.templating import Jinja2Templates
 
+from thesteambot.web.assets import StaticAssets, etag_matches
+
+log = logging.getLogger(__name__)
+
 assert __package__ is not None
 package = importlib.resources.files(__package__)
 
-templates = Jinja2Templates(directory=str(package.joinpath("templates")))
+# Templates and static files are synced into the container during development
+DEBUG = os.getenv("DEBUG") not in (None, "", "0")
+DOMAIN = os.environ["DOMAIN"]
+
+
+def _create_bytecode_cache() -> jinja2.BytecodeCache:
+    # Defaults to a per-user directory in the system's temporary directory
+    directory = os.getenv("WEB_TEMPLATE_CACHE_DIR") or None
+    if directory is not None:
+        os.makedirs(directory, exist_ok=True)
+    return jinja2.FileSystemBytecodeCache(directory)
+
+
+env = jinja2.Environment(
+    loader=jinja2.FileSystemLoader(str(package.joinpath("templates"))),
+    autoescape=True,
+    bytecode_cache=_create_bytecode_cache(),
+)
+templates = Jinja2Templates(env=env)
+assets = StaticAssets(package.joinpath("static"), reload=DEBUG)
+assets.install(templates.env)
+
+
+def compile_templates() -> None:
+    """Load every template ahead of time, so no request has to compile one."""
+    start = time.perf_counter()
+    names = templates.env.list_templates()
+    for name in names:
+        templates.get_template(name)
+
+    elapsed = time.perf_counter() - start
+    log.info("%d templates compiled in %.3fs", len(names), elapsed)
+
+
+class RenderedPage(NamedTuple):
+    content: bytes
+    etag: str
+
+
+_rendered_pages: dict[str, RenderedPage] = {}
+
+
+def cached_template_response(request: Request, name: str) -> Response:
+    """Render a template that doesn't depend on the request only once.
+
+    Outside of debug mode, URLs are generated for https://DOMAIN
+    regardless of the host the page was requested from.
+    """
+    page = _rendered_pages.get(name)
+    if page is None or DEBUG:
+        render_request = request if DEBUG else _canonicalize_request(request)
+        content = templates.get_template(name).render(request=render_request)
+        content = content.encode()
+        etag = f'"{hashlib.sha256(content).hexdigest()[:16]}"'
+        page = _rendered_pages[name] = RenderedPage(content, etag)
+
+    headers = {"ETag": page.etag, "Cache-Control": "no-cache"}
+    if etag_matches(page.etag, request.headers):
+        return Response(status_code=304, headers=headers)
+    return Response(page.content, headers=headers, media_type="text/html")
+
+
+def _canonicalize_request(request: Request) -> Request:
+    # Only the parts needed for url_for(), which use the Host header
+    scope = dict(request.scope)
+    scope["scheme"] = "https"
+    scope["headers"] = [(b"host", DOMAIN.encode())]
+    return Request(scope)